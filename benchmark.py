@@ -0,0 +1,252 @@
+# benchmark.py
+"""
+Benchmark Module for Automobile Recommendation System
+Times model loading, single and batch prediction, CSV parsing against
+the dataset cache and the training pipeline at several dataset sizes,
+writes the results as JSON and compares them against a stored baseline
+Author: Prathamesh Parab
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+from dataset_cache import DatasetCache
+from model_trainer import CarModelTrainer
+from predictor import CarPredictor, INPUT_COLUMNS
+from synthetic_data import SyntheticCarGenerator
+
+DEFAULT_SIZES = [5000, 50000]
+DEFAULT_THRESHOLD = 0.10
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the modules' status prints while timing"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(function, *args, **kwargs):
+    """Run function once and return (result, seconds)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def make_dataset(source, n_rows, path, seed=0):
+    """Write n_rows synthetic records shaped like the source CSV"""
+    with quiet():
+        return SyntheticCarGenerator(source, seed=seed).generate(path, n_rows, workers=0)
+
+
+class BenchmarkSuite:
+    def __init__(self, dataset_path='cartest.csv', sizes=None, repeats=5, n_single=1000,
+                 batch_size=10000, accuracy_mode='cv', seed=0):
+        self.dataset_path = dataset_path
+        self.sizes = sizes or DEFAULT_SIZES
+        self.repeats = repeats
+        self.n_single = n_single
+        self.batch_size = batch_size
+        self.accuracy_mode = accuracy_mode
+        self.seed = seed
+        self.metrics = {}
+
+    def record(self, name, value, unit, better='lower'):
+        self.metrics[name] = {'value': float(value), 'unit': unit, 'better': better}
+        print(f"   {name:40} {value:14,.3f} {unit}")
+
+    def bench_training(self, prefix, dataset, models_dir):
+        """Time prepare_data, train_model and save_model on one dataset"""
+        # prepare_data keeps timing the CSV parse; bench_dataset times the cache
+        trainer = CarModelTrainer(dataset, config={'accuracy_mode': self.accuracy_mode}, cache_dir=None)
+        with quiet():
+            _, prepare = timed(trainer.prepare_data)
+            _, train = timed(trainer.train_model)
+            _, save = timed(trainer.save_model, models_dir)
+        self.record(f'{prefix}.prepare_data', prepare, 's')
+        self.record(f'{prefix}.train_model', train, 's')
+        self.record(f'{prefix}.save_model', save, 's')
+
+    def bench_dataset(self, prefix, dataset, cache_dir):
+        """Time parsing the CSV against building and then loading the column cache"""
+        parse_times = [timed(pd.read_csv, dataset)[1] for _ in range(self.repeats)]
+        cache = DatasetCache(cache_dir)
+        with quiet():
+            _, build = timed(cache.load, dataset)
+        load_times = [timed(lambda: cache.load(dataset).to_frame())[1] for _ in range(self.repeats)]
+        self.record(f'{prefix}.dataset_parse', np.median(parse_times) * 1000, 'ms')
+        self.record(f'{prefix}.dataset_cache_build', build * 1000, 'ms')
+        self.record(f'{prefix}.dataset_cache_load', np.median(load_times) * 1000, 'ms')
+
+    def bench_predictor(self, prefix, dataset, models_dir):
+        """Time model load, single-row latency and batch throughput"""
+        load_times = []
+        for _ in range(self.repeats):
+            with quiet():
+                predictor, seconds = timed(CarPredictor, models_dir)
+            load_times.append(seconds)
+        self.record(f'{prefix}.model_load', np.median(load_times) * 1000, 'ms')
+
+        data = pd.read_csv(dataset, usecols=INPUT_COLUMNS)
+        rng = np.random.RandomState(self.seed)
+        cars = data.iloc[rng.randint(0, len(data), self.n_single)].itertuples(index=False, name=None)
+        latencies = []
+        for car in cars:
+            _, seconds = timed(predictor.predict, *car)
+            latencies.append(seconds * 1e6)
+        for percentile in (50, 90, 99):
+            self.record(f'{prefix}.predict_p{percentile}', np.percentile(latencies, percentile), 'us')
+
+        batch = data.iloc[rng.randint(0, len(data), self.batch_size)].reset_index(drop=True)
+        batch_times = [timed(predictor.predict_batch, batch)[1] for _ in range(self.repeats)]
+        self.record(f'{prefix}.batch_throughput', self.batch_size / np.median(batch_times),
+                    'rows/s', better='higher')
+
+    def run(self):
+        """Run every benchmark and return the results dict"""
+        workdir = tempfile.mkdtemp(prefix='car_bench_')
+        try:
+            for size in self.sizes:
+                print(f"⏱️ Benchmarking with {size:,} records...")
+                prefix = f'n{size}'
+                dataset = make_dataset(self.dataset_path, size, os.path.join(workdir, f'{prefix}.csv'),
+                                       self.seed)
+                models_dir = os.path.join(workdir, f'{prefix}_models')
+                self.bench_dataset(prefix, dataset, os.path.join(workdir, 'cache'))
+                self.bench_training(prefix, dataset, models_dir)
+                self.bench_predictor(prefix, dataset, models_dir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        return {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'sklearn': sklearn.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'sizes': self.sizes,
+                'repeats': self.repeats,
+                'accuracy_mode': self.accuracy_mode
+            },
+            'metrics': self.metrics
+        }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, overrides=None, allow_missing=False):
+    """Compare two result dicts; returns (rows, regressions)
+
+    A metric regresses when it is worse than the baseline by more than its
+    threshold (a fraction: 0.10 allows 10% slower or 10% less throughput).
+    A baseline metric absent from the current results (a benchmark deleted
+    or renamed) counts as a regression unless allow_missing is set.
+    """
+    overrides = overrides or {}
+    rows = []
+    regressions = []
+    for name, base in baseline['metrics'].items():
+        if name not in current['metrics']:
+            if allow_missing:
+                rows.append((name, base['value'], None, None, 'missing'))
+            else:
+                rows.append((name, base['value'], None, None, 'MISSING'))
+                regressions.append(name)
+            continue
+        value = current['metrics'][name]['value']
+        change = (value - base['value']) / base['value'] if base['value'] else 0.0
+        worse = change if base['better'] == 'lower' else -change
+        limit = overrides.get(name, threshold)
+        status = 'REGRESSED' if worse > limit else 'ok'
+        if status == 'REGRESSED':
+            regressions.append(name)
+        rows.append((name, base['value'], value, change, status))
+    return rows, regressions
+
+
+def print_comparison(rows):
+    print(f"{'metric':40} {'baseline':>14} {'current':>14} {'change':>8}  status")
+    for name, base, value, change, status in rows:
+        current = f'{value:14,.3f}' if value is not None else f"{'-':>14}"
+        delta = f'{change:+8.1%}' if change is not None else f"{'-':>8}"
+        print(f"{name:40} {base:14,.3f} {current} {delta}  {status}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_overrides(pairs):
+    """Parse metric=threshold pairs from the command line"""
+    overrides = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        overrides[name] = float(value)
+    return overrides
+
+
+def check(baseline, current, args):
+    rows, regressions = compare(baseline, current, args.threshold, parse_overrides(args.metric_threshold),
+                                args.allow_missing)
+    print_comparison(rows)
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed past the threshold or are missing: "
+              f"{', '.join(regressions)}")
+        return 1
+    print("✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the car recommendation system")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_threshold_args(subparser):
+        subparser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                               help="Allowed slowdown as a fraction (default: 0.10)")
+        subparser.add_argument('--metric-threshold', action='append', metavar='METRIC=FRACTION',
+                               help="Per-metric threshold, e.g. n5000.predict_p99=0.25")
+        subparser.add_argument('--allow-missing', action='store_true',
+                               help="Do not fail on baseline metrics missing from the current results")
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmarks and write JSON results")
+    run_parser.add_argument('--dataset', default='cartest.csv', help="CSV the synthetic datasets are modelled on")
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help="Comma-separated dataset sizes")
+    run_parser.add_argument('--repeats', type=int, default=5)
+    run_parser.add_argument('--single', type=int, default=1000, help="Single predictions to time")
+    run_parser.add_argument('--batch-size', type=int, default=10000)
+    run_parser.add_argument('--accuracy-mode', default='cv', help="Trainer accuracy mode")
+    run_parser.add_argument('--output', default='benchmark.json')
+    run_parser.add_argument('--baseline', help="Compare against this results file after running")
+    add_threshold_args(run_parser)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two results files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    add_threshold_args(compare_parser)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        suite = BenchmarkSuite(args.dataset, [int(size) for size in args.sizes.split(',')], args.repeats,
+                               args.single, args.batch_size, args.accuracy_mode)
+        results = suite.run()
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+        if args.baseline:
+            sys.exit(check(load_results(args.baseline), results, args))
+    else:
+        sys.exit(check(load_results(args.baseline), load_results(args.current), args))
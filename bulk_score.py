@@ -0,0 +1,103 @@
+# bulk_score.py
+"""
+Bulk Scoring Module for Automobile Recommendation System
+Streams an inventory CSV (cartest.csv schema without CarName) through a
+process pool of CarPredictor workers and writes recommendations in order
+Author: Prathamesh Parab
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from predictor import CarPredictor
+
+_worker_predictor = None
+
+
+def _init_worker(models_dir):
+    """Load the models once per worker process"""
+    global _worker_predictor
+    _worker_predictor = CarPredictor(models_dir)
+
+
+def score_chunk(chunk, predictor=None):
+    """Score one chunk and return it with category, top cars, confidence and errors columns"""
+    predictor = predictor or _worker_predictor
+    results = predictor.predict_batch(chunk)
+    scored = chunk.copy()
+    scored['category'] = [result.get('category', '') for result in results]
+    scored['recommended_cars'] = ['; '.join(result.get('recommended_cars', [])) for result in results]
+    scored['confidence'] = [result.get('confidence', np.nan) for result in results]
+    scored['errors'] = ['; '.join(result.get('errors', [])) for result in results]
+    return scored
+
+
+class BulkScorer:
+    def __init__(self, models_dir='models', chunksize=50000, workers=None):
+        self.models_dir = models_dir
+        self.chunksize = chunksize
+        self.workers = os.cpu_count() if workers is None else workers
+        self.rows = 0
+        self.failed_rows = 0
+        self.elapsed = 0.0
+
+    def _write(self, scored, output_path, first):
+        scored.to_csv(output_path, mode='w' if first else 'a', header=first, index=False)
+        self.rows += len(scored)
+        self.failed_rows += int((scored['errors'] != '').sum())
+        rate = self.rows / (time.perf_counter() - self._start)
+        print(f"   {self.rows:,} rows scored ({rate:,.0f} rows/s)")
+
+    def score_file(self, input_path, output_path):
+        """Score input_path into output_path, preserving row order
+
+        At most two chunks per worker are in flight, so memory stays bounded
+        regardless of the input size.
+        """
+        print(f"📂 Scoring {input_path} in chunks of {self.chunksize:,} rows "
+              f"with {self.workers or 'no'} worker processes...")
+        self.rows = 0
+        self.failed_rows = 0
+        self._start = time.perf_counter()
+        reader = pd.read_csv(input_path, chunksize=self.chunksize)
+        first = True
+
+        if self.workers == 0:
+            predictor = CarPredictor(self.models_dir)
+            for chunk in reader:
+                self._write(score_chunk(chunk, predictor), output_path, first)
+                first = False
+        else:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                     initargs=(self.models_dir,)) as pool:
+                in_flight = deque()
+                for chunk in reader:
+                    in_flight.append(pool.submit(score_chunk, chunk))
+                    if len(in_flight) >= 2 * self.workers:
+                        self._write(in_flight.popleft().result(), output_path, first)
+                        first = False
+                while in_flight:
+                    self._write(in_flight.popleft().result(), output_path, first)
+                    first = False
+
+        self.elapsed = time.perf_counter() - self._start
+        rate = self.rows / self.elapsed if self.elapsed else 0.0
+        print(f"✓ Scored {self.rows:,} rows in {self.elapsed:.1f}s ({rate:,.0f} rows/s), "
+              f"{self.failed_rows:,} with errors -> {output_path}")
+        return self.rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-score an inventory CSV with the car recommendation model")
+    parser.add_argument('input', help="CSV with Year, price, Fuel type, Gear box type, Manufacturer, Color")
+    parser.add_argument('output', help="Output CSV (input columns + category, recommended_cars, confidence, errors)")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 0: score in this process)")
+    args = parser.parse_args()
+    BulkScorer(args.models_dir, args.chunksize, args.workers).score_file(args.input, args.output)
@@ -0,0 +1,176 @@
+# compact_forest.py
+"""
+Compact Forest Module for Automobile Recommendation System
+Post-training compaction of the random forest: thresholds become small
+indices into each feature's table of split points, leaves keep only
+their majority class, and prediction is a vote over trees
+Author: Prathamesh Parab
+"""
+
+import numpy as np
+
+COMPACT_BUNDLE_FILENAME = 'car_model.compact.bundle'
+
+# Rows scored per traversal pass (bounds temporary memory)
+BATCH_CHUNK_SIZE = 4096
+
+
+def _smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+class CompactForest:
+    engine_type = 'compact'
+
+    def __init__(self, feature, split_index, children, leaf_class, split_values, split_offsets,
+                 roots, classes, max_depth):
+        self.feature = feature              # split feature per node (0 for leaves)
+        self.split_index = split_index      # threshold as index into the feature's split values
+        self.children = children            # interleaved (right, left) children; leaves point at themselves
+        self.leaf_class = leaf_class        # majority class column per node (used at leaves)
+        self.split_values = split_values    # sorted split points of all features, concatenated
+        self.split_offsets = split_offsets  # start of each feature's split points in split_values
+        self.roots = roots                  # global index of each tree's root node
+        self.classes = classes              # class labels, as in model.classes_
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compact a fitted RandomForestClassifier"""
+        if not hasattr(model, 'estimators_') or getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only fitted single-output random forests can be compacted")
+        n_features = model.n_features_in_
+
+        # Each feature's distinct split points, in ascending order
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        split_points = [[] for _ in range(n_features)]
+        for tree in trees:
+            is_split = tree.children_left != -1
+            for feature in range(n_features):
+                split_points[feature].append(tree.threshold[is_split & (tree.feature == feature)])
+        split_points = [np.unique(np.concatenate(points)) for points in split_points]
+        split_offsets = np.cumsum([0] + [len(points) for points in split_points])
+
+        # Leaves get an index past every bin, so they always "go left" to themselves
+        index_dtype = _smallest_uint(max(len(points) for points in split_points) + 1)
+        leaf_marker = np.iinfo(index_dtype).max
+
+        features, split_indexes, children, leaf_classes, roots = [], [], [], [], []
+        node_offset = 0
+        max_depth = 0
+        for tree in trees:
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+            feature = np.where(is_leaf, 0, tree.feature)
+            split_index = np.full(tree.node_count, leaf_marker, dtype=np.int64)
+            for f in range(n_features):
+                nodes = ~is_leaf & (feature == f)
+                split_index[nodes] = np.searchsorted(split_points[f], tree.threshold[nodes])
+
+            left = np.where(is_leaf, node_ids, tree.children_left) + node_offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + node_offset
+            features.append(feature)
+            split_indexes.append(split_index)
+            children.append(np.stack([right, left], axis=1).ravel())
+            leaf_classes.append(np.argmax(tree.value[:, 0, :model.n_classes_], axis=1))
+            roots.append(node_offset)
+            node_offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(_smallest_uint(n_features - 1)),
+            split_index=np.concatenate(split_indexes).astype(index_dtype),
+            children=np.concatenate(children).astype(np.int32),
+            leaf_class=np.concatenate(leaf_classes).astype(_smallest_uint(model.n_classes_ - 1)),
+            split_values=np.concatenate(split_points).astype(np.float64),
+            split_offsets=split_offsets.astype(np.int32),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=int(max_depth),
+        )
+
+    def arrays(self):
+        """Return the arrays by name (used for serialization)"""
+        return {
+            'feature': self.feature,
+            'split_index': self.split_index,
+            'children': self.children,
+            'leaf_class': self.leaf_class,
+            'split_values': self.split_values,
+            'split_offsets': self.split_offsets,
+            'roots': self.roots,
+            'classes': self.classes,
+        }
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def bins(self, X):
+        """Position of each feature value among that feature's split points
+
+        x <= split_values[j] exactly when bin(x) <= j. Values are compared
+        as float32, like sklearn trees do.
+        """
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        bins = np.empty(X.shape, dtype=np.int64)
+        for f in range(X.shape[1]):
+            points = self.split_values[self.split_offsets[f]:self.split_offsets[f + 1]]
+            bins[:, f] = np.searchsorted(points, X[:, f], side='left')
+        return bins
+
+    def apply(self, X):
+        """Return the leaf node reached in every tree, shape (n_trees, n_rows)"""
+        bins = self.bins(X)
+        n_rows = len(bins)
+        columns = np.ascontiguousarray(bins.T).ravel()
+        rows = np.arange(n_rows)
+        nodes = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            go_left = columns[self.feature[nodes].astype(np.int64) * n_rows + rows] <= self.split_index[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        """Share of tree votes per class"""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        n_classes = len(self.classes)
+        proba = np.empty((len(X), n_classes), dtype=np.float64)
+        for start in range(0, len(X), BATCH_CHUNK_SIZE):
+            votes = self.leaf_class[self.apply(X[start:start + BATCH_CHUNK_SIZE])].astype(np.int64)
+            n_rows = votes.shape[1]
+            flat = (np.arange(n_rows) * n_classes + votes).ravel()
+            proba[start:start + n_rows] = np.bincount(flat, minlength=n_rows * n_classes).reshape(n_rows, n_classes)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Predict class labels by majority vote (ties go to the lowest class)"""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_proba_one(self, features):
+        """Share of tree votes per class for a single encoded feature row"""
+        bins = self.bins(np.asarray(features)[np.newaxis, :])[0]
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            go_left = bins[self.feature[nodes]] <= self.split_index[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return np.bincount(self.leaf_class[nodes], minlength=len(self.classes)) / self.n_trees
+
+    def predict_one(self, features):
+        """Predict the class label for a single encoded feature row"""
+        return self.classes[np.argmax(self.predict_proba_one(features))]
+
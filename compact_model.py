@@ -0,0 +1,165 @@
+# compact_model.py
+"""
+Model Compaction Module for Automobile Recommendation System
+Writes the compact (quantized, majority-vote) forest bundle next to the
+saved models and reports size, load time and prediction agreement
+Author: Prathamesh Parab
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from compact_forest import COMPACT_BUNDLE_FILENAME, CompactForest
+from forest_engine import CompiledForest
+from model_bundle import BUNDLE_FILENAME, load_bundle, write_bundle
+from model_trainer import CarModelTrainer
+from synthetic_data import SyntheticCarGenerator
+
+CATEGORICAL_FEATURES = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color']
+
+
+def load_artifacts(models_dir):
+    """Read the pickle artifacts written by CarModelTrainer"""
+    artifacts = {}
+    for name in ['car_model', 'label_encoders', 'target_encoder', 'category_cars', 'metadata']:
+        with open(f'{models_dir}/{name}.pkl', 'rb') as f:
+            artifacts[name] = pickle.load(f)
+    return artifacts
+
+
+def encode_rows(data, label_encoders, target_encoder):
+    """Encoded features and targets for the rows whose values the encoders know"""
+    X = np.empty((len(data), 6), dtype=np.float64)
+    X[:, 0] = data['Year'].to_numpy()
+    X[:, 1] = data['price'].to_numpy()
+    for column, feature in enumerate(CATEGORICAL_FEATURES, start=2):
+        lookup = {value: code for code, value in enumerate(label_encoders[feature].classes_)}
+        X[:, column] = data[feature].map(lookup).to_numpy(dtype=np.float64)
+
+    categories = CarModelTrainer(None).create_categories(data)
+    lookup = {value: code for code, value in enumerate(target_encoder.classes_)}
+    y = categories.map(lookup).to_numpy(dtype=np.float64)
+
+    known = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+    return X[known], y[known].astype(np.int64)
+
+
+def best_time(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compact_model(models_dir='models', dataset_path='cartest.csv', repeats=3, synthetic_rows=100000):
+    """Write the compact bundle and return a report comparing it with the original model
+
+    Load times are for reading the whole file (no memory mapping).
+    Agreement and accuracy are measured on the dataset rows and on fresh
+    synthetic rows modelled on the dataset (prices the forest never saw).
+    """
+    artifacts = load_artifacts(models_dir)
+    model = artifacts['car_model']
+
+    start = time.perf_counter()
+    compact = CompactForest.from_sklearn(model)
+    compact_seconds = time.perf_counter() - start
+
+    compact_path = f'{models_dir}/{COMPACT_BUNDLE_FILENAME}'
+    write_bundle(compact_path, compact, artifacts['label_encoders'], artifacts['target_encoder'],
+                 artifacts['category_cars'], artifacts['metadata'])
+
+    bundle_path = f'{models_dir}/{BUNDLE_FILENAME}'
+    if not os.path.exists(bundle_path):
+        write_bundle(bundle_path, CompiledForest.from_sklearn(model), artifacts['label_encoders'],
+                     artifacts['target_encoder'], artifacts['category_cars'], artifacts['metadata'])
+    engine = load_bundle(bundle_path, mmap=False)['engine']
+
+    def load_pickle():
+        with open(f'{models_dir}/car_model.pkl', 'rb') as f:
+            pickle.load(f)
+
+    compact_engine = load_bundle(compact_path, mmap=False)['engine']
+    samples = {'dataset': pd.read_csv(dataset_path)}
+    if synthetic_rows:
+        samples['synthetic'] = SyntheticCarGenerator(dataset_path, seed=7).sample(synthetic_rows)
+    quality = {}
+    for name, data in samples.items():
+        X, y = encode_rows(data, artifacts['label_encoders'], artifacts['target_encoder'])
+        original = model.predict(X)
+        compacted = compact_engine.predict(X)
+        quality[name] = {
+            'rows': len(X),
+            'agreement': float(np.mean(compacted == original)),
+            'accuracy_original': float(np.mean(original == y)),
+            'accuracy_compact': float(np.mean(compacted == y)),
+        }
+
+    return {
+        'n_trees': compact.n_trees,
+        'n_nodes': compact.n_nodes,
+        'compact_seconds': compact_seconds,
+        'file_bytes': {
+            'pickle': os.path.getsize(f'{models_dir}/car_model.pkl'),
+            'bundle': os.path.getsize(bundle_path),
+            'compact': os.path.getsize(compact_path),
+        },
+        'array_bytes': {
+            'bundle': sum(array.nbytes for array in engine.arrays().values()),
+            'compact': sum(array.nbytes for array in compact.arrays().values()),
+        },
+        'load_seconds': {
+            'pickle': best_time(load_pickle, repeats),
+            'bundle': best_time(lambda: load_bundle(bundle_path, mmap=False), repeats),
+            'compact': best_time(lambda: load_bundle(compact_path, mmap=False), repeats),
+        },
+        'quality': quality,
+    }
+
+
+def format_report(report):
+    files, arrays, load = report['file_bytes'], report['array_bytes'], report['load_seconds']
+    rows = [('pickle', files['pickle'], None, load['pickle']),
+            ('bundle', files['bundle'], arrays['bundle'], load['bundle']),
+            ('compact bundle', files['compact'], arrays['compact'], load['compact'])]
+    lines = [f"📦 Compacted {report['n_trees']} trees ({report['n_nodes']:,} nodes) "
+             f"in {report['compact_seconds']:.2f}s",
+             f"   {'':16}{'file':>12}{'arrays':>12}{'load':>12}"]
+    for name, file_bytes, array_bytes, seconds in rows:
+        array_size = f'{array_bytes / 1e6:10.2f}MB' if array_bytes is not None else f"{'-':>12}"
+        lines.append(f"   {name:16}{file_bytes / 1e6:10.2f}MB{array_size}{seconds * 1000:10.1f}ms")
+    lines += [
+        f"✓ {files['bundle'] / files['compact']:.0f}x smaller than the bundle, "
+        f"{files['pickle'] / files['compact']:.0f}x smaller than the pickle",
+        f"✓ Loads {load['bundle'] / load['compact']:.0f}x faster than the bundle, "
+        f"{load['pickle'] / load['compact']:.0f}x faster than the pickle",
+    ]
+    for name, quality in report['quality'].items():
+        lines.append(f"🎯 Agreement with the original forest on {quality['rows']:,} {name} rows: "
+                     f"{quality['agreement']:.2%} (accuracy {quality['accuracy_original']:.2%} -> "
+                     f"{quality['accuracy_compact']:.2%})")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a compact quantized model and report the savings")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--dataset', default='cartest.csv', help="Rows used to measure prediction agreement")
+    parser.add_argument('--repeats', type=int, default=3, help="Load-time repeats (best is reported)")
+    parser.add_argument('--synthetic-rows', type=int, default=100000,
+                        help="Fresh synthetic rows also used for agreement (0 to skip)")
+    parser.add_argument('--json', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = compact_model(args.models_dir, args.dataset, args.repeats, args.synthetic_rows)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(f"✓ Compact model written to {args.models_dir}/{COMPACT_BUNDLE_FILENAME}")
@@ -0,0 +1,228 @@
+# dataset_cache.py
+"""
+Dataset Cache Module for Automobile Recommendation System
+Converts the training CSV once into memory-mapped NumPy column files
+(compact dtypes, dictionary-encoded categoricals) and reloads it from
+there while the CSV is unchanged
+Author: Prathamesh Parab
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from metrics import default_metrics
+
+DEFAULT_CACHE_DIR = '.cache/datasets'
+
+# Bumped whenever the on-disk layout changes; older entries are rebuilt
+CACHE_FORMAT = 1
+
+INTEGER_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compact_numeric(values):
+    """Smallest dtype that holds every value exactly"""
+    if values.dtype.kind == 'i':
+        for dtype in INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                return values.astype(dtype)
+    if values.dtype == np.float64:
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+            return narrow
+    return values
+
+
+def dictionary_encode(series):
+    """Sorted distinct values and integer codes (-1 for missing)
+
+    The dictionary is sorted like LabelEncoder.classes_, so the codes are
+    the label-encoded column.
+    """
+    # Hash once, then sort only the distinct values
+    codes, uniques = pd.factorize(series)
+    uniques = np.asarray(uniques, dtype=object)
+    order = np.argsort(uniques, kind='stable')
+    categories = uniques[order]
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    codes = np.where(codes < 0, -1, rank[codes])
+    for dtype in INTEGER_DTYPES:
+        if len(categories) <= np.iinfo(dtype).max:
+            return categories, codes.astype(dtype)
+
+
+class CachedDataset:
+    def __init__(self, path, meta, status):
+        """Memory-mapped columns of one cache entry
+
+        status is 'hit', 'rehashed' (the CSV was touched but its contents
+        are unchanged) or 'built'.
+        """
+        self.path = path
+        self.meta = meta
+        self.status = status
+        self.columns = [column['name'] for column in meta['columns']]
+        self._columns = {column['name']: column for column in meta['columns']}
+        self._arrays = {}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def array(self, name):
+        """Stored values of a column (codes for categoricals), memory-mapped"""
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, self._columns[name]['file']), mmap_mode='r')
+        return self._arrays[name]
+
+    def is_categorical(self, name):
+        return self._columns[name]['kind'] == 'categorical'
+
+    def has_missing(self, name):
+        return self._columns[name]['missing'] > 0
+
+    def categories(self, name):
+        """Sorted distinct values of a categorical column"""
+        column = self._columns[name]
+        return np.load(os.path.join(self.path, column['categories'])).astype(object)
+
+    def codes(self, name):
+        return self.array(name)
+
+    def column(self, name):
+        """A column as read_csv returns it: categoricals decoded, numbers in compact dtypes"""
+        column = self._columns[name]
+        if column['kind'] == 'categorical':
+            decoded = pd.Categorical.from_codes(self.array(name), self.categories(name))
+            return pd.Series(decoded, name=name).astype(column['dtype'])
+        return pd.Series(np.array(self.array(name)), name=name)
+
+    def to_frame(self, columns=None):
+        """DataFrame of the selected columns (all by default)"""
+        return pd.DataFrame({name: self.column(name) for name in (columns or self.columns)})
+
+
+class DatasetCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, metrics=None):
+        """Column-file cache of CSV datasets under cache_dir
+
+        Entries are keyed by the CSV's absolute path and validated by its
+        size and mtime; when only the mtime moved, the content hash decides
+        whether the entry is still good.
+        """
+        self.cache_dir = cache_dir
+        self.metrics = metrics or default_metrics
+
+    def entry_path(self, csv_path):
+        source = os.path.abspath(csv_path)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:10]}")
+
+    def read_meta(self, entry):
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('format') == CACHE_FORMAT else None
+
+    def write_meta(self, entry, meta):
+        tmp_path = os.path.join(entry, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(entry, 'meta.json'))
+
+    def load(self, csv_path):
+        """Open the cached columns of csv_path, converting the CSV first if needed"""
+        entry = self.entry_path(csv_path)
+        stat = os.stat(csv_path)
+        meta = self.read_meta(entry)
+        status = 'built'
+        if meta is not None and meta['size'] == stat.st_size:
+            if meta['mtime_ns'] == stat.st_mtime_ns:
+                status = 'hit'
+            elif meta['sha1'] == file_digest(csv_path):
+                # Touched or checked out again, same contents
+                meta['mtime_ns'] = stat.st_mtime_ns
+                self.write_meta(entry, meta)
+                status = 'rehashed'
+        if status == 'built':
+            meta = self.build(csv_path, entry)
+        if self.metrics.enabled:
+            self.metrics.inc('dataset_cache_total', status=status)
+        return CachedDataset(entry, meta, status)
+
+    def build(self, csv_path, entry):
+        """Parse the CSV and write its columns to a fresh entry"""
+        stat = os.stat(csv_path)
+        digest = file_digest(csv_path)
+        start = time.perf_counter()
+        data = pd.read_csv(csv_path)
+        parse_seconds = time.perf_counter() - start
+
+        # Write next to the entry and swap it in, so readers never see half an entry
+        tmp_entry = f'{entry}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        columns = []
+        for index, name in enumerate(data.columns):
+            series = data[name]
+            column = {'name': name, 'dtype': str(series.dtype), 'file': f'{index}.npy'}
+            if series.dtype.kind in 'biuf':
+                values = compact_numeric(series.to_numpy())
+                column.update(kind='numeric', missing=int(series.isna().sum()))
+            else:
+                categories, values = dictionary_encode(series)
+                column.update(kind='categorical', missing=int((values < 0).sum()),
+                              categories=f'{index}.categories.npy', n_categories=len(categories))
+                np.save(os.path.join(tmp_entry, column['categories']), categories.astype(str))
+            column['storage'] = str(values.dtype)
+            np.save(os.path.join(tmp_entry, column['file']), values)
+            columns.append(column)
+
+        meta = {
+            'format': CACHE_FORMAT,
+            'source': os.path.abspath(csv_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha1': digest,
+            'rows': len(data),
+            'columns': columns,
+            'parse_seconds': parse_seconds,
+            'created': time.time(),
+        }
+        self.write_meta(tmp_entry, meta)
+
+        old_entry = f'{entry}.old-{os.getpid()}'
+        if os.path.exists(entry):
+            os.rename(entry, old_entry)
+        os.rename(tmp_entry, entry)
+        shutil.rmtree(old_entry, ignore_errors=True)
+        print(f"📦 Cached {os.path.basename(csv_path)} as column files in {entry} "
+              f"({len(data):,} rows, parsed in {parse_seconds:.2f}s)")
+        return meta
+
+    def clear(self, csv_path=None):
+        """Remove the entry for csv_path, or the whole cache"""
+        shutil.rmtree(self.entry_path(csv_path) if csv_path else self.cache_dir, ignore_errors=True)
+
+
+def read_dataset(csv_path, cache_dir=DEFAULT_CACHE_DIR):
+    """The dataset as a DataFrame, through the cache unless cache_dir is None"""
+    if cache_dir is None:
+        return pd.read_csv(csv_path)
+    return DatasetCache(cache_dir).load(csv_path).to_frame()
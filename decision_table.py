@@ -0,0 +1,315 @@
+# decision_table.py
+"""
+Decision Table Module for Automobile Recommendation System
+Compiles the random forest into a piecewise table: for each year and
+categorical combination, the forest's price split points and the class
+predicted on every price interval, so a prediction is a dict lookup
+plus a bisect
+Author: Prathamesh Parab
+"""
+
+import bisect
+import pickle
+import time
+from array import array
+import numpy as np
+from forest_engine import CompiledForest
+
+DECISION_TABLE_FILENAME = 'decision_table.pkl'
+
+# Encoded feature columns: the table is keyed on year and the categoricals
+PRICE_COLUMN = 1
+KEY_COLUMNS = [0, 2, 3, 4, 5]
+
+# Combinations traversed together (bounds temporary memory)
+COMBINATIONS_PER_PASS = 64
+
+# Interval representatives checked against the full forest prediction
+DEFAULT_PREDICT_SAMPLE = 50000
+
+
+def float32_floor(values):
+    """Largest float32 <= each value
+
+    sklearn compares float32 features with float64 thresholds, so
+    x <= threshold exactly when x <= float32_floor(threshold).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class DecisionTable:
+    def __init__(self, index, breakpoints, labels, classes, n_nodes, model_version=None, report=None):
+        """Table of compiled combinations
+
+        index maps (year, fuel, gear, manufacturer, color) codes to
+        (start, end, label_start): the combination's price breakpoints
+        are breakpoints[start:end] and its end - start + 1 interval
+        labels start at labels[label_start]. Interval i holds the prices
+        in (breakpoints[i - 1], breakpoints[i]].
+        """
+        self.index = index
+        self.breakpoints = breakpoints      # array('f'), ascending within each combination
+        self.labels = labels                # array('H'), class label per interval
+        self.classes = classes
+        self.n_nodes = n_nodes              # size of the forest it was compiled from
+        self.model_version = model_version
+        self.report = report or {}
+
+    def lookup(self, features):
+        """Class label for one encoded row, or None when its combination is not compiled"""
+        entry = self.index.get((features[0], features[2], features[3], features[4], features[5]))
+        if entry is None:
+            return None
+        start, end, label_start = entry
+        price = float(np.float32(features[1]))
+        return self.labels[label_start + bisect.bisect_left(self.breakpoints, price, start, end) - start]
+
+    def predict_one(self, features, forest):
+        """Class label for one encoded row, from the forest when not compiled"""
+        label = self.lookup(features)
+        if label is None:
+            return forest.predict_one(features)
+        return label
+
+    def predict(self, X, forest):
+        """Class labels for a batch; rows of uncompiled combinations go to the forest"""
+        X = np.asarray(X, dtype=np.float64)
+        labels = np.empty(len(X), dtype=np.int64)
+        missing = []
+        for i, row in enumerate(X.tolist()):
+            label = self.lookup(row)
+            if label is None:
+                missing.append(i)
+            else:
+                labels[i] = label
+        if missing:
+            labels[missing] = forest.predict(X[missing])
+        return labels
+
+    def __contains__(self, features):
+        return (features[0], features[2], features[3], features[4], features[5]) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def n_intervals(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        """Serialized size of the table"""
+        return len(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def compile(cls, model, combinations, model_version=None, predict_sample=DEFAULT_PREDICT_SAMPLE, seed=0):
+        """Compile a fitted RandomForestClassifier for the given combinations
+
+        combinations is an array of (year, fuel, gear, manufacturer,
+        color) codes. For each one, every tree is walked with the price
+        left open, which yields the price interval of each reachable leaf.
+        The interval boundaries cut the price axis into cells on which
+        every tree's leaf, and so the forest's prediction, is constant.
+        Class probabilities per cell are summed from the leaf values in
+        estimator order (exactly like sklearn), and adjacent cells with
+        the same class are merged.
+
+        Verification is exhaustive: the leaves of every cell are checked
+        against model.apply and every cell is looked up through the
+        table; a sample of cells is also checked against model.predict.
+        Combinations whose leaves disagree are left out of the table
+        (they fall back to the forest).
+        """
+        start_time = time.perf_counter()
+        forest = CompiledForest.from_sklearn(model)
+        tables = _LeafTables(forest)
+        combinations = np.unique(np.asarray(combinations, dtype=np.float64), axis=0)
+        sample_per_combination = max(1, predict_sample // max(len(combinations), 1))
+        rng = np.random.default_rng(seed)
+
+        compiled = []
+        n_cells = 0
+        failed = 0
+        sample_rows, sample_labels = [], []
+        for first in range(0, len(combinations), COMBINATIONS_PER_PASS):
+            chunk = list(tables.compile_chunk(combinations[first:first + COMBINATIONS_PER_PASS]))
+            rows = np.concatenate([_cell_rows(key, _cell_prices(cuts)) for key, cuts, _, _ in chunk])
+            leaves = model.apply(rows)
+            offset = 0
+            for key, cuts, cell_labels, cell_leaves in chunk:
+                cell_rows = rows[offset:offset + len(cell_labels)]
+                matches = np.array_equal(leaves[offset:offset + len(cell_labels)], cell_leaves)
+                offset += len(cell_labels)
+                if not matches:
+                    failed += 1
+                    continue
+                compiled.append((tuple(int(code) for code in key), cuts, cell_labels))
+                n_cells += len(cell_labels)
+                sample = rng.choice(len(cell_rows), min(sample_per_combination, len(cell_rows)), replace=False)
+                sample_rows.append(cell_rows[sample])
+                sample_labels.append(cell_labels[sample])
+
+        table = cls._from_compiled(compiled, forest, model_version)
+
+        # Every cell through the lookup path, and a sample through model.predict
+        lookup_mismatches = 0
+        for key, cuts, cell_labels in compiled:
+            row = [key[0], 0.0, key[1], key[2], key[3], key[4]]
+            for price, label in zip(_cell_prices(cuts).tolist(), cell_labels.tolist()):
+                row[1] = price
+                if table.lookup(row) != label:
+                    lookup_mismatches += 1
+        predict_mismatches = 0
+        n_sampled = 0
+        if sample_rows:
+            sample_rows = np.concatenate(sample_rows)
+            predict_mismatches = int((model.predict(sample_rows) != np.concatenate(sample_labels)).sum())
+            n_sampled = len(sample_rows)
+
+        table.report = {
+            'combinations': len(combinations),
+            'compiled': len(table),
+            'failed': failed,
+            'cells_verified': n_cells,
+            'lookup_mismatches': lookup_mismatches,
+            'predict_sample': n_sampled,
+            'predict_mismatches': predict_mismatches,
+            'intervals': table.n_intervals,
+            'seconds': time.perf_counter() - start_time,
+        }
+        if lookup_mismatches or predict_mismatches:
+            raise ValueError(f"Decision table disagrees with the forest "
+                             f"({lookup_mismatches} lookups, {predict_mismatches} predictions)")
+        return table
+
+    @classmethod
+    def _from_compiled(cls, compiled, forest, model_version):
+        index = {}
+        breakpoints = array('f')
+        labels = array('H')
+        for key, cuts, cell_labels in compiled:
+            # Keep only the cuts where the class changes
+            changes = np.flatnonzero(cell_labels[1:] != cell_labels[:-1])
+            index[key] = (len(breakpoints), len(breakpoints) + len(changes), len(labels))
+            breakpoints.extend(cuts[changes].tolist())
+            labels.extend(cell_labels[np.concatenate([[0], changes + 1])].tolist())
+        return cls(index, breakpoints, labels, forest.classes, forest.n_nodes, model_version)
+
+
+def _cell_rows(key, prices):
+    """Encoded float32 rows for one combination at the given prices"""
+    rows = np.empty((len(prices), len(KEY_COLUMNS) + 1), dtype=np.float32)
+    rows[:, KEY_COLUMNS] = key
+    rows[:, PRICE_COLUMN] = prices
+    return rows
+
+
+def _cell_prices(cuts):
+    """One price inside each cell: its upper cut, and just above the last cut"""
+    if len(cuts) == 0:
+        return np.zeros(1, dtype=np.float32)
+    return np.append(cuts, np.nextafter(cuts[-1], np.float32(np.inf)))
+
+
+class _LeafTables:
+    def __init__(self, forest):
+        """Sparse leaf values and float32 price cuts of a compiled forest"""
+        self.forest = forest
+        self.n_classes = forest.leaf_value.shape[1]
+        self.cuts = float32_floor(forest.threshold)
+        self.tree_of_node = np.repeat(np.arange(forest.n_trees),
+                                      np.diff(np.append(forest.roots, forest.n_nodes)))
+        # Pure leaves dominate, so most leaves add to a single class
+        rows, columns = np.nonzero(forest.leaf_value)
+        self.value_start = np.searchsorted(rows, np.arange(len(forest.leaf_value) + 1))
+        self.value_column = columns
+        self.value = forest.leaf_value[rows, columns]
+
+    def reachable_leaves(self, keys):
+        """Walk every tree for every key with the price left open
+
+        Returns the key index, node, and (low, high] price interval of
+        every reachable leaf.
+        """
+        forest = self.forest
+        rows = np.zeros((len(keys), len(KEY_COLUMNS) + 1), dtype=np.float32)
+        rows[:, KEY_COLUMNS] = keys
+        key_index = np.repeat(np.arange(len(keys)), forest.n_trees)
+        node = np.tile(forest.roots, len(keys)).astype(np.int64)
+        low = np.full(len(node), -np.inf, dtype=np.float32)
+        high = np.full(len(node), np.inf, dtype=np.float32)
+
+        leaves = []
+        while len(node):
+            is_leaf = forest.left[node] == node
+            leaves.append((key_index[is_leaf], node[is_leaf], low[is_leaf], high[is_leaf]))
+            key_index, node, low, high = key_index[~is_leaf], node[~is_leaf], low[~is_leaf], high[~is_leaf]
+
+            feature = forest.feature[node]
+            on_price = feature == PRICE_COLUMN
+            fixed = ~on_price
+            go_left = rows[key_index[fixed], feature[fixed]] <= forest.threshold[node[fixed]]
+            fixed_next = np.where(go_left, forest.left[node[fixed]], forest.right[node[fixed]])
+
+            # Price splits branch both ways, narrowing the interval
+            cut = self.cuts[node[on_price]]
+            price_low, price_high = low[on_price], high[on_price]
+            left_high = np.minimum(price_high, cut)
+            right_low = np.maximum(price_low, cut)
+            left_open = price_low < left_high
+            right_open = right_low < price_high
+
+            price_keys, price_nodes = key_index[on_price], node[on_price]
+            key_index = np.concatenate([key_index[fixed], price_keys[left_open], price_keys[right_open]])
+            node = np.concatenate([fixed_next, forest.left[price_nodes[left_open]],
+                                   forest.right[price_nodes[right_open]]])
+            low = np.concatenate([low[fixed], price_low[left_open], right_low[right_open]])
+            high = np.concatenate([high[fixed], left_high[left_open], price_high[right_open]])
+
+        return [np.concatenate(parts) for parts in zip(*leaves)]
+
+    def compile_chunk(self, keys):
+        """Yield (key, cuts, cell labels, cell leaves) per key"""
+        forest = self.forest
+        key_index, node, low, high = self.reachable_leaves(keys)
+        tree = self.tree_of_node[node]
+        # Group by key, then tree order (the order sklearn sums trees in)
+        order = np.lexsort((low, tree, key_index))
+        key_index, node, low, high, tree = key_index[order], node[order], low[order], high[order], tree[order]
+        bounds = np.searchsorted(key_index, np.arange(len(keys) + 1))
+
+        for k in range(len(keys)):
+            leaf_node = node[bounds[k]:bounds[k + 1]]
+            leaf_low, leaf_high = low[bounds[k]:bounds[k + 1]], high[bounds[k]:bounds[k + 1]]
+            leaf_tree = tree[bounds[k]:bounds[k + 1]]
+            bounds_found = np.concatenate([leaf_low, leaf_high])
+            cuts = np.unique(bounds_found[np.isfinite(bounds_found)])
+            n_cells = len(cuts) + 1
+
+            # Each leaf covers the cells first..last of its interval
+            first = np.where(np.isinf(leaf_low), 0, np.searchsorted(cuts, leaf_low) + 1)
+            last = np.where(np.isinf(leaf_high), len(cuts), np.searchsorted(cuts, leaf_high))
+            span = last - first + 1
+            leaf_of_pair = np.repeat(np.arange(len(leaf_node)), span)
+            cell = first[leaf_of_pair] + np.arange(len(leaf_of_pair)) - np.repeat(np.cumsum(span) - span, span)
+
+            # Sum class values per cell with bincount, which adds in input
+            # order: pairs are in tree order, like sklearn's accumulation
+            leaf_row = forest.leaf_index[leaf_node[leaf_of_pair]]
+            n_values = self.value_start[leaf_row + 1] - self.value_start[leaf_row]
+            pair_of_value = np.repeat(np.arange(len(leaf_of_pair)), n_values)
+            value_position = (self.value_start[leaf_row][pair_of_value] + np.arange(len(pair_of_value))
+                              - np.repeat(np.cumsum(n_values) - n_values, n_values))
+            proba = np.bincount(cell[pair_of_value] * self.n_classes + self.value_column[value_position],
+                                weights=self.value[value_position], minlength=n_cells * self.n_classes)
+            proba = proba.reshape(n_cells, self.n_classes) / forest.n_trees
+            cell_labels = forest.classes.take(np.argmax(proba, axis=1)).astype(np.int64)
+
+            # Leaf reached by each tree in each cell, as sklearn's apply reports it
+            cell_leaves = np.empty((n_cells, forest.n_trees), dtype=np.int64)
+            cell_leaves[cell, leaf_tree[leaf_of_pair]] = leaf_node[leaf_of_pair] - forest.roots[leaf_tree[leaf_of_pair]]
+            yield keys[k], cuts, cell_labels, cell_leaves
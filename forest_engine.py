@@ -0,0 +1,182 @@
+# forest_engine.py
+"""
+Forest Inference Engine for Automobile Recommendation System
+Flattens a trained RandomForestClassifier into contiguous node arrays
+and traverses them directly for single rows and batches
+Author: Prathamesh Parab
+"""
+
+import numpy as np
+
+# sklearn trees compare features in float32
+FEATURE_DTYPE = np.float32
+
+# Rows scored per traversal pass in predict_proba (bounds temporary memory)
+BATCH_CHUNK_SIZE = 4096
+
+
+def top_k_classes(proba, k):
+    """Column indices and probabilities of the k most likely classes per row
+
+    Uses a partial sort (argpartition) and orders only the k survivors, by
+    descending probability then class index; the result equals a full
+    stable sort, so the first column always agrees with predict.
+    """
+    proba = np.atleast_2d(proba)
+    n_classes = proba.shape[1]
+    k = max(1, min(k, n_classes))
+    if k < n_classes:
+        candidates = np.argpartition(proba, n_classes - k, axis=1)[:, n_classes - k:]
+        # Rows where ties straddle the k-th place: the partition may have kept
+        # a higher class index, so fall back to a full sort for just those rows
+        kth = np.take_along_axis(proba, candidates, axis=1).min(axis=1)
+        ambiguous = np.flatnonzero((proba >= kth[:, np.newaxis]).sum(axis=1) > k)
+        if len(ambiguous):
+            candidates[ambiguous] = np.argsort(-proba[ambiguous], axis=1, kind='stable')[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_classes), proba.shape)
+    probabilities = np.take_along_axis(proba, candidates, axis=1)
+    order = np.lexsort((candidates, -probabilities), axis=1)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(probabilities, order, axis=1)
+
+
+class CompiledForest:
+    engine_type = 'compiled'
+
+    def __init__(self, feature, threshold, left, right, leaf_index, leaf_value,
+                 roots, classes, max_depth, children=None):
+        self.feature = feature          # split feature per node (0 for leaves)
+        self.threshold = threshold      # split threshold per node (+inf for leaves)
+        self.left = left                # global index of left child (self for leaves)
+        self.right = right              # global index of right child (self for leaves)
+        self.leaf_index = leaf_index    # row in leaf_value per node (0 for split nodes)
+        self.leaf_value = leaf_value    # normalized class distribution per leaf
+        self.roots = roots              # global index of each tree's root node
+        self.classes = classes          # class labels, as in model.classes_
+        self.max_depth = max_depth      # deepest tree, bounds the traversal loop
+        # Interleaved (right, left) children so one gather picks the next node
+        if children is None:
+            children = np.stack([right, left], axis=1).ravel()
+        self.children = children
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Export a fitted RandomForestClassifier into flat node arrays"""
+        if not hasattr(model, 'estimators_') or getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only fitted single-output random forests can be compiled")
+
+        features, thresholds, lefts, rights, leaf_indexes, leaf_values, roots = [], [], [], [], [], [], []
+        node_offset = 0
+        leaf_offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+
+            # Leaves point at themselves and always pass the threshold test,
+            # so traversal can run a fixed number of steps for every tree
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + node_offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + node_offset)
+
+            # Recent sklearn stores class fractions in tree_.value; older
+            # releases store counts and normalize them in predict_proba
+            value = tree.value[is_leaf, 0, :model.n_classes_]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            if np.any(normalizer > 1.0 + 1e-6):
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            leaf_values.append(value)
+
+            leaf_index = np.zeros(tree.node_count, dtype=np.int64)
+            leaf_index[is_leaf] = np.arange(is_leaf.sum()) + leaf_offset
+            leaf_indexes.append(leaf_index)
+
+            roots.append(node_offset)
+            node_offset += tree.node_count
+            leaf_offset += int(is_leaf.sum())
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+            leaf_index=np.ascontiguousarray(np.concatenate(leaf_indexes), dtype=np.int32),
+            leaf_value=np.ascontiguousarray(np.concatenate(leaf_values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=int(max_depth),
+        )
+
+    def arrays(self):
+        """Return the node arrays by name (used for serialization)"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'children': self.children,
+            'leaf_index': self.leaf_index,
+            'leaf_value': self.leaf_value,
+            'roots': self.roots,
+            'classes': self.classes,
+        }
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def apply(self, X):
+        """Return the leaf node reached in every tree, shape (n_trees, n_rows)"""
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
+        n_rows = len(X)
+        # Feature-major copy so each step is a single flat gather
+        columns = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n_rows)
+        nodes = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            go_left = columns[self.feature[nodes] * n_rows + rows] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        """Average class probabilities over all trees (matches sklearn)"""
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+
+        proba = np.zeros((len(X), self.leaf_value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), BATCH_CHUNK_SIZE):
+            nodes = self.apply(X[start:start + BATCH_CHUNK_SIZE])
+            chunk = proba[start:start + BATCH_CHUNK_SIZE]
+            # Accumulate tree by tree, in estimator order, like sklearn does
+            for tree_nodes in nodes:
+                chunk += self.leaf_value[self.leaf_index[tree_nodes]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Predict class labels for a batch of encoded feature rows"""
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_proba_one(self, features):
+        """Class probabilities for a single encoded feature row"""
+        x = np.asarray(features, dtype=FEATURE_DTYPE)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            go_left = x[self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        # Reducing over the leading axis adds rows in tree order
+        return self.leaf_value[self.leaf_index[nodes]].sum(axis=0) / self.n_trees
+
+    def predict_one(self, features):
+        """Predict the class label for a single encoded feature row"""
+        return self.classes[np.argmax(self.predict_proba_one(features))]
@@ -1,14 +1,167 @@
+import argparse
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox, ttk, font
-from predictor import CarPredictor
-import pandas as pd
+
+# How often the Tk thread picks up results posted by worker threads
+POLL_MS = 30
+
+# Quiet time after the last input change before a live prediction runs
+LIVE_DELAY_MS = 400
+
+def load_predictor(models_dir='models', dataset_path='cartest.csv', status=print, use_registry=True,
+                   reinstall=False):
+    """Train a model if none is saved yet, then load it
+    
+    Runs on a worker thread. The predictor (numpy, pandas, sklearn) is
+    imported here rather than at module level so the window can appear
+    before those imports finish. With use_registry, models_dir gets the
+    registry's build for the dataset, trained only if none is stored;
+    models the registry did not install are kept while they were trained
+    on the current dataset, unless reinstall=True.
+    """
+    if use_registry:
+        from model_registry import ModelRegistry
+        registry = ModelRegistry()
+        if registry.ensure(dataset_path, models_dir, train=False, reinstall=reinstall)[1] == 'missing':
+            status("Training a new model for this dataset...")
+            registry.ensure(dataset_path, models_dir, reinstall=reinstall)
+    elif not os.path.exists(f'{models_dir}/car_model.pkl'):
+        status("Training a new model (first run)...")
+        from model_trainer import CarModelTrainer
+        trainer = CarModelTrainer(dataset_path)
+        trainer.prepare_data()
+        trainer.train_model()
+        trainer.save_model(models_dir)
+    status("Loading models...")
+    from predictor import CarPredictor
+    return CarPredictor(models_dir)
 
 class CarRecommendationGUI:
-    def __init__(self):
-        self.predictor = CarPredictor()
-        self.options = self.predictor.get_available_options()
+    def __init__(self, models_dir='models', dataset_path='cartest.csv', live=False,
+                 live_delay_ms=LIVE_DELAY_MS, started=None, exit_when_ready=False, use_registry=True,
+                 reinstall=False):
+        """Show the window at once and load (or train) the model in the background
+        
+        live=True re-predicts whenever the inputs change, live_delay_ms after
+        the last change. Startup times are measured from `started` (a
+        time.perf_counter() value, default now); exit_when_ready closes the
+        window as soon as the model is loaded, to measure startup.
+        use_registry=False keeps whatever model models_dir holds; reinstall=True
+        lets the registry replace models it did not install.
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.models_dir = models_dir
+        self.dataset_path = dataset_path
+        self.live_delay_ms = live_delay_ms
+        self.exit_when_ready = exit_when_ready
+        self.use_registry = use_registry
+        self.reinstall = reinstall
+        self.predictor = None
+        self.options = None
+        self.startup_times = {}
+        self.results = queue.Queue()
+        self.prediction_id = 0
+        self.live_job = None
         self.setup_window()
+        self.live_var = tk.BooleanVar(master=self.root, value=live)
+        self.create_loading_screen()
+        self.root.after(0, self.window_shown)
+        self.root.after(POLL_MS, self.poll_results)
+        self.run_in_background(self.load_models, self.models_loaded, self.loading_failed)
+        
+    def run_in_background(self, work, done, failed):
+        """Run work() on a worker thread
+        
+        Tk widgets may only be touched from the Tk thread, so the outcome is
+        queued and done(result) or failed(error) is called by poll_results.
+        """
+        def target():
+            try:
+                self.results.put((done, work()))
+            except Exception as e:
+                self.results.put((failed, e))
+        
+        threading.Thread(target=target, daemon=True).start()
+    
+    def poll_results(self):
+        """Deliver results posted by worker threads, then check again in POLL_MS"""
+        while True:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            callback(value)
+        self.root.after(POLL_MS, self.poll_results)
+    
+    def load_models(self):
+        """Load (or first train) the predictor; runs on a worker thread"""
+        start = time.perf_counter()
+        predictor = load_predictor(self.models_dir, self.dataset_path,
+                                   status=lambda text: self.results.put((self.set_loading_status, text)),
+                                   use_registry=self.use_registry, reinstall=self.reinstall)
+        self.startup_times['load'] = time.perf_counter() - start
+        return predictor
+    
+    def create_loading_screen(self):
+        self.loading_frame = tk.Frame(self.root, bg='#4834d4')
+        self.loading_frame.pack(fill='both', expand=True)
+        
+        loading_content = tk.Frame(self.loading_frame, bg='#4834d4')
+        loading_content.pack(expand=True)
+        
+        tk.Label(loading_content, text="🚗 Automobile Recommendation System",
+                font=self.title_font, bg='#4834d4', fg='white').pack(pady=(0, 20))
+        
+        self.loading_label = tk.Label(loading_content, text="Starting...",
+                                      font=self.subtitle_font, bg='#4834d4', fg='#dfe6e9')
+        self.loading_label.pack(pady=(0, 15))
+        
+        self.progress = ttk.Progressbar(loading_content, mode='indeterminate', length=300)
+        self.progress.pack()
+        self.progress.start(15)
+    
+    def set_loading_status(self, text):
+        self.loading_label.config(text=text)
+    
+    def window_shown(self):
+        self.startup_times['window'] = time.perf_counter() - self.started
+    
+    def models_loaded(self, predictor):
+        """Replace the loading screen with the form once the model is ready"""
+        self.predictor = predictor
+        self.options = predictor.get_available_options()
+        self.progress.stop()
+        self.loading_frame.destroy()
         self.create_widgets()
+        self.root.update_idletasks()
+        self.startup_times['ready'] = time.perf_counter() - self.started
+        self.report_startup()
+        if self.exit_when_ready:
+            self.root.after(0, self.root.destroy)
+    
+    def loading_failed(self, error):
+        self.progress.stop()
+        self.loading_label.config(text=f"❌ Could not load the model: {error}")
+        print(f"❌ Could not load the model: {error}")
+        if self.exit_when_ready:
+            self.root.after(0, self.root.destroy)
+            return
+        messagebox.showerror("❌ Error", f"Could not load the model:\n{error}")
+    
+    def report_startup(self):
+        """Print the startup times and record them in the predictor's metrics"""
+        times = self.startup_times
+        print(f"⏱️ Startup: window shown in {times.get('window', times['ready']):.2f}s, "
+              f"model loaded in {times['load']:.2f}s, ready in {times['ready']:.2f}s")
+        metrics = self.predictor.metrics
+        if metrics.enabled:
+            for stage in ('window', 'load', 'ready'):
+                if stage in times:
+                    metrics.observe(f'gui.startup.{stage}', times[stage])
         
     def setup_window(self):
         self.root = tk.Tk()
@@ -76,6 +229,11 @@ class CarRecommendationGUI:
         self.manufacturer_var = tk.StringVar()
         self.color_var = tk.StringVar()
         
+        # Live mode re-predicts on any change
+        for var in (self.year_var, self.price_var, self.fuel_var, self.gear_var,
+                    self.manufacturer_var, self.color_var):
+            var.trace_add('write', self.input_changed)
+        
         # Create input rows
         self.create_input_row(fields_frame, "📅 Year (2005-2024):", self.year_var)
         self.create_input_row(fields_frame, "💰 Price ($):", self.price_var)
@@ -110,11 +268,11 @@ class CarRecommendationGUI:
         buttons_frame = tk.Frame(parent, bg='white')
         buttons_frame.pack(pady=(0, 30))
         
-        predict_btn = tk.Button(buttons_frame, text="🔍 Find My Car", 
-                               command=self.predict_car,
-                               font=self.button_font, bg='#0984e3', fg='white',
-                               padx=25, pady=10, relief='flat', cursor='hand2')
-        predict_btn.pack(side='left', padx=10)
+        self.predict_btn = tk.Button(buttons_frame, text="🔍 Find My Car", 
+                                    command=self.predict_car,
+                                    font=self.button_font, bg='#0984e3', fg='white',
+                                    padx=25, pady=10, relief='flat', cursor='hand2')
+        self.predict_btn.pack(side='left', padx=10)
         
         self.clear_btn = tk.Button(buttons_frame, text="🔄 Clear", 
                                   command=self.clear_inputs,
@@ -127,6 +285,10 @@ class CarRecommendationGUI:
                              font=self.button_font, bg='#a29bfe', fg='white',
                              padx=25, pady=10, relief='flat', cursor='hand2')
         about_btn.pack(side='left', padx=10)
+        
+        tk.Checkbutton(parent, text="⚡ Live update as I type", variable=self.live_var,
+                       command=self.input_changed, font=self.label_font,
+                       bg='white', activebackground='white').pack(pady=(0, 15))
     
     def create_result_section(self):
         result_container = tk.Frame(self.root, bg='#f5f6fa')
@@ -165,48 +327,91 @@ class CarRecommendationGUI:
                 font=font.Font(family="Segoe UI", size=10),
                 bg='#2d3436', fg='#dfe6e9').pack(pady=10)
     
-    def predict_car(self):
+    def predict_car(self, live=False):
+        """Check the inputs and predict on a worker thread
+        
+        Live predictions skip incomplete input quietly instead of
+        opening a dialog.
+        """
+        if self.predictor is None:
+            return
         try:
             # Get inputs
             year = int(self.year_var.get())
             price = int(self.price_var.get())
-            fuel_type = self.fuel_var.get()
-            gear_type = self.gear_var.get()
-            manufacturer = self.manufacturer_var.get()
-            color = self.color_var.get()
-            
-            if not all([fuel_type, gear_type, manufacturer, color]):
+        except ValueError:
+            if not live:
+                messagebox.showerror("❌ Input Error", 
+                                   "Please enter valid numeric values for Year and Price.")
+            return
+        fuel_type = self.fuel_var.get()
+        gear_type = self.gear_var.get()
+        manufacturer = self.manufacturer_var.get()
+        color = self.color_var.get()
+        
+        if not all([fuel_type, gear_type, manufacturer, color]):
+            if not live:
                 messagebox.showwarning("⚠️ Input Error", "Please fill in all fields!")
-                return
+            return
+        
+        # Only the latest request is shown; older ones still running are dropped
+        self.prediction_id += 1
+        prediction_id = self.prediction_id
+        if not live:
+            self.predict_btn.config(text="⏳ Searching...")
+        
+        # Make prediction
+        self.run_in_background(
+            lambda: self.predictor.predict(year, price, fuel_type, gear_type, manufacturer, color),
+            lambda result: self.show_prediction(prediction_id, result, live),
+            lambda error: self.show_prediction(prediction_id, {'success': False, 'errors': [str(error)]}, live))
+    
+    def show_prediction(self, prediction_id, result, live):
+        if prediction_id != self.prediction_id:
+            return
+        self.predict_btn.config(text="🔍 Find My Car")
+        
+        if result['success']:
+            # Update result display
+            self.result_frame.configure(bg='#00b894')
+            self.category_label.config(text=f"Category: {result['category']}", 
+                                     bg='#00b894', fg='white')
             
-            # Make prediction
-            result = self.predictor.predict(year, price, fuel_type, gear_type, 
-                                          manufacturer, color)
+            # Show recommended models
+            models_text = "Recommended Models:\n"
+            for i, car in enumerate(result['recommended_cars'], 1):
+                models_text += f"{i}. {car.upper()}\n"
             
-            if result['success']:
-                # Update result display
-                self.result_frame.configure(bg='#00b894')
-                self.category_label.config(text=f"Category: {result['category']}", 
-                                         bg='#00b894', fg='white')
-                
-                # Show recommended models
-                models_text = "Recommended Models:\n"
-                for i, car in enumerate(result['recommended_cars'], 1):
-                    models_text += f"{i}. {car.upper()}\n"
-                
-                self.models_label.config(text=models_text, bg='#00b894', fg='white')
-                self.confidence_label.config(text=f"Confidence: {result['confidence']:.1%}", 
-                                           bg='#00b894', fg='white')
-                
-                self.clear_btn.config(state='normal', bg='#e17055')
-            else:
-                # Show errors
-                error_msg = "\n".join(result['errors'])
-                messagebox.showerror("❌ Error", error_msg)
-                
-        except ValueError:
-            messagebox.showerror("❌ Input Error", 
-                               "Please enter valid numeric values for Year and Price.")
+            self.models_label.config(text=models_text, bg='#00b894', fg='white')
+            self.confidence_label.config(text=f"Confidence: {result['confidence']:.1%}", 
+                                       bg='#00b894', fg='white')
+            
+            self.clear_btn.config(state='normal', bg='#e17055')
+        elif live:
+            # Show errors in place while typing
+            self.reset_result("\n".join(result['errors']))
+        else:
+            # Show errors
+            error_msg = "\n".join(result['errors'])
+            messagebox.showerror("❌ Error", error_msg)
+    
+    def input_changed(self, *args):
+        """Debounce live mode: predict once the inputs are unchanged for live_delay_ms"""
+        if self.live_job is not None:
+            self.root.after_cancel(self.live_job)
+            self.live_job = None
+        if self.live_var.get():
+            self.live_job = self.root.after(self.live_delay_ms, self.live_predict)
+    
+    def live_predict(self):
+        self.live_job = None
+        self.predict_car(live=True)
+    
+    def reset_result(self, text="Your Recommendation Will Appear Here"):
+        self.result_frame.configure(bg='#dfe6e9')
+        self.category_label.config(text=text, fg='#636e72', bg='#dfe6e9')
+        self.models_label.config(text="", bg='#dfe6e9')
+        self.confidence_label.config(text="", bg='#dfe6e9')
     
     def clear_inputs(self):
         self.year_var.set("")
@@ -216,11 +421,10 @@ class CarRecommendationGUI:
         self.manufacturer_var.set("")
         self.color_var.set("")
         
-        self.result_frame.configure(bg='#dfe6e9')
-        self.category_label.config(text="Your Recommendation Will Appear Here", 
-                                  fg='#636e72', bg='#dfe6e9')
-        self.models_label.config(text="", bg='#dfe6e9')
-        self.confidence_label.config(text="", bg='#dfe6e9')
+        # Discard predictions still running
+        self.prediction_id += 1
+        self.predict_btn.config(text="🔍 Find My Car")
+        self.reset_result()
         self.clear_btn.config(state='disabled', bg='#b2bec3')
     
     def show_about(self):
@@ -275,5 +479,20 @@ Random Forest Classification algorithm."""
         self.root.mainloop()
 
 if __name__ == "__main__":
-    app = CarRecommendationGUI()
+    parser = argparse.ArgumentParser(description="Automobile recommendation desktop app")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--dataset', default='cartest.csv', help="Trained on when no saved model exists")
+    parser.add_argument('--live', action='store_true', help="Re-predict as the inputs change")
+    parser.add_argument('--live-delay-ms', type=int, default=LIVE_DELAY_MS)
+    parser.add_argument('--startup-time', action='store_true',
+                        help="Print startup times and exit once the model is loaded")
+    parser.add_argument('--no-registry', action='store_true',
+                        help="Use whatever is in --models-dir instead of matching it to the dataset")
+    parser.add_argument('--reinstall', action='store_true',
+                        help="Replace models in --models-dir that the registry did not build")
+    args = parser.parse_args()
+    
+    app = CarRecommendationGUI(args.models_dir, args.dataset, live=args.live,
+                               live_delay_ms=args.live_delay_ms, exit_when_ready=args.startup_time,
+                               use_registry=not args.no_registry, reinstall=args.reinstall)
     app.run()
\ No newline at end of file
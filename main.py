@@ -6,12 +6,24 @@ Author: Prathamesh Parab
 BDA Project - SFIT 2023-24
 """
 
+import argparse
 import os
 import sys
+import time
 from pathlib import Path
 
-def check_requirements():
-    """Check if all required files and packages are present"""
+# Startup is measured from here, before the heavy imports
+STARTED = time.perf_counter()
+
+def check_requirements(use_registry=True, reinstall=False):
+    """Check if all required files and packages are present
+    
+    With use_registry, models/ is matched to cartest.csv through the
+    model registry: a stored build for the same data and settings is
+    installed at once, otherwise the app trains one in the background.
+    Models the registry did not install are kept while they were trained
+    on the current cartest.csv, unless reinstall=True.
+    """
     required_files = ['cartest.csv', 'model_trainer.py', 'predictor.py', 'gui.py']
     missing_files = []
     
@@ -25,27 +37,44 @@ def check_requirements():
             print(f"   - {file}")
         return False
     
-    # Check if models exist
-    if not os.path.exists('models/car_model.pkl'):
-        print("📊 Models not found. Training new model...")
-        from model_trainer import CarModelTrainer
-        trainer = CarModelTrainer('cartest.csv')
-        trainer.prepare_data()
-        trainer.train_model()
-        trainer.save_model()
-        print("✓ Model training complete!\n")
+    # Check if models exist (the app trains them in the background)
+    if use_registry:
+        from model_registry import ModelRegistry
+        entry, outcome = ModelRegistry().ensure('cartest.csv', 'models', train=False, reinstall=reinstall)
+        if outcome == 'unmanaged':
+            print("✓ models/ holds models trained by hand on the current cartest.csv; "
+                  "using them as is. Run with --reinstall to replace them.")
+        elif outcome == 'current':
+            print(f"✓ Models match cartest.csv (build {entry['key']})")
+        elif outcome == 'reused':
+            print(f"✓ Reusing model build {entry['key']} "
+                  f"(trained in {entry['build_seconds']:.1f}s, {entry['accuracy']:.1%} accuracy)")
+        else:
+            print("📊 No model built for this dataset yet. A new model will be trained when the app starts.")
+    elif not os.path.exists('models/car_model.pkl'):
+        print("📊 Models not found. A new model will be trained when the app starts.")
     
     return True
 
 def main():
     """Main application entry point"""
+    parser = argparse.ArgumentParser(description="Automobile Recommendation System")
+    parser.add_argument('--live', action='store_true', help="Re-predict as the inputs change")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="Print startup times and exit once the model is loaded")
+    parser.add_argument('--no-registry', action='store_true',
+                        help="Use whatever is in models/ instead of matching it to cartest.csv")
+    parser.add_argument('--reinstall', action='store_true',
+                        help="Replace models in models/ that the registry did not build")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("AUTOMOBILE RECOMMENDATION SYSTEM")
     print("Developed by: Prathamesh Parab")
     print("=" * 60)
     
     # Check requirements
-    if not check_requirements():
+    if not check_requirements(use_registry=not args.no_registry, reinstall=args.reinstall):
         print("\n❌ Please ensure all required files are present.")
         sys.exit(1)
     
@@ -55,7 +84,8 @@ def main():
     # Import and run GUI
     try:
         from gui import CarRecommendationGUI
-        app = CarRecommendationGUI()
+        app = CarRecommendationGUI(live=args.live, started=STARTED, exit_when_ready=args.startup_time,
+                                   use_registry=not args.no_registry, reinstall=args.reinstall)
         app.run()
     except Exception as e:
         print(f"❌ Error starting application: {e}")
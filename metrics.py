@@ -0,0 +1,146 @@
+# metrics.py
+"""
+Metrics Module for Automobile Recommendation System
+Switchable per-stage timers and counters for the predictor and trainer,
+exported as a Prometheus text file or a JSON snapshot
+Author: Prathamesh Parab
+"""
+
+import json
+import os
+import threading
+import time
+
+PREFIX = 'car'
+
+# Prometheus HELP lines for the metrics recorded by this package
+HELP = {
+    'stage_seconds': "Time spent per pipeline stage",
+    'predictions_total': "Predictions made, by mode",
+    'prediction_errors_total': "Rejected or failed predictions, by error type",
+    'cache_hits_total': "Prediction cache hits",
+    'cache_misses_total': "Prediction cache misses",
+    'model_reloads_total': "Model hot reloads, by status",
+    'dataset_cache_total': "Dataset cache loads, by status (hit, rehashed, built)",
+}
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _write_atomic(path, text):
+    """Write via a temp file and rename, so scrapers never see a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        """Stage timers and counters; while disabled nothing is recorded
+
+        Callers guard their timing with `if metrics.enabled`, so the
+        disabled path costs one attribute check per stage.
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+
+    def observe(self, stage, seconds):
+        """Record one timing for a stage"""
+        with self._lock:
+            timer = self.stages.get(stage)
+            if timer is None:
+                self.stages[stage] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def lap(self, stage, start):
+        """Record the time since start for a stage and return the new start"""
+        now = time.perf_counter()
+        self.observe(stage, now - start)
+        return now
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter (labels become Prometheus labels)"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        """JSON-serializable copy of all timers and counters"""
+        with self._lock:
+            stages = {stage: {'count': count, 'total_seconds': total, 'max_seconds': longest,
+                              'mean_seconds': total / count}
+                      for stage, (count, total, longest) in self.stages.items()}
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in self.counters.items()]
+        return {'timestamp': time.time(), 'stages': stages, 'counters': counters}
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        if snapshot['stages']:
+            name = f'{PREFIX}_stage_seconds'
+            lines += [f'# HELP {name} {HELP["stage_seconds"]}', f'# TYPE {name} summary']
+            for stage, timer in sorted(snapshot['stages'].items()):
+                labels = _labels([('stage', stage)])
+                lines.append(f'{name}_count{labels} {timer["count"]}')
+                lines.append(f'{name}_sum{labels} {timer["total_seconds"]:.9f}')
+            lines += [f'# HELP {name}_max Longest single timing per stage', f'# TYPE {name}_max gauge']
+            for stage, timer in sorted(snapshot['stages'].items()):
+                lines.append(f'{name}_max{_labels([("stage", stage)])} {timer["max_seconds"]:.9f}')
+
+        by_name = {}
+        for counter in snapshot['counters']:
+            by_name.setdefault(counter['name'], []).append(counter)
+        for name, counters in sorted(by_name.items()):
+            full_name = f'{PREFIX}_{name}'
+            if name in HELP:
+                lines.append(f'# HELP {full_name} {HELP[name]}')
+            lines.append(f'# TYPE {full_name} counter')
+            for counter in sorted(counters, key=lambda counter: sorted(counter['labels'].items())):
+                lines.append(f'{full_name}{_labels(sorted(counter["labels"].items()))} {counter["value"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write a Prometheus text file (e.g. for node_exporter's textfile collector)"""
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def export(self, path):
+        """Write JSON for *.json paths, Prometheus text otherwise"""
+        if path.endswith('.json'):
+            self.write_json(path)
+        else:
+            self.write_prometheus(path)
+
+
+# Shared registry used when no Metrics instance is passed in; CAR_METRICS=1 enables it
+default_metrics = Metrics(enabled=os.environ.get('CAR_METRICS') == '1')
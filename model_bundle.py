@@ -0,0 +1,164 @@
+# model_bundle.py
+"""
+Model Bundle Module for Automobile Recommendation System
+Single-file, memory-mappable model artifact: a small JSON header with
+the encoders and metadata, followed by the forest node arrays stored as
+raw aligned buffers
+Author: Prathamesh Parab
+"""
+
+import json
+import os
+import struct
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from compact_forest import CompactForest
+from forest_engine import CompiledForest
+
+BUNDLE_FILENAME = 'car_model.bundle'
+BUNDLE_MAGIC = b'CARMODEL'
+BUNDLE_VERSION = 2
+
+# Engine classes by the 'engine' header field (version 1 bundles are always 'compiled')
+ENGINES = {
+    'compiled': CompiledForest,
+    'compact': CompactForest,
+}
+
+# magic, format version, header length
+PREAMBLE = struct.Struct('<8sII')
+
+# Every array starts on a 64-byte boundary so it can be viewed in place
+ALIGNMENT = 64
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _to_builtin(value):
+    """JSON fallback for numpy scalars and arrays in metadata"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__} in model bundle")
+
+
+def _restore_encoder(classes):
+    """Rebuild a fitted LabelEncoder from its class list"""
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes, dtype=object)
+    return encoder
+
+
+def write_bundle(path, engine, label_encoders, target_encoder, category_cars, metadata):
+    """Write the compiled forest, encoders and metadata to a single file
+
+    The file is written next to `path` and renamed into place, so readers
+    never see a partially written bundle.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in engine.arrays().items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Array '{name}' has object dtype and cannot be bundled")
+
+    # Lay out arrays after the header; offsets are relative to the data start
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {
+            'dtype': array.dtype.newbyteorder('<').str,
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset += array.nbytes
+
+    engine_type = getattr(engine, 'engine_type', 'compiled')
+    header = {
+        'engine': engine_type,
+        'arrays': layout,
+        'max_depth': engine.max_depth,
+        'label_encoders': {feature: list(encoder.classes_) for feature, encoder in label_encoders.items()},
+        'target_classes': list(target_encoder.classes_),
+        'category_cars': category_cars,
+        'metadata': metadata
+    }
+    header_bytes = json.dumps(header, default=_to_builtin).encode('utf-8')
+    data_start = _align(PREAMBLE.size + len(header_bytes))
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        # Compiled-engine bundles stay readable by version 1 readers
+        version = 1 if engine_type == 'compiled' else BUNDLE_VERSION
+        f.write(PREAMBLE.pack(BUNDLE_MAGIC, version, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.astype(layout[name]['dtype'], copy=False).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return path
+
+
+def read_bundle_header(path):
+    """Read and check the bundle preamble and JSON header"""
+    with open(path, 'rb') as f:
+        preamble = f.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            raise ValueError(f"Truncated model bundle: {path}")
+        magic, version, header_length = PREAMBLE.unpack(preamble)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"Not a model bundle: {path}")
+        if version > BUNDLE_VERSION:
+            raise ValueError(f"Unsupported model bundle version {version} (max {BUNDLE_VERSION})")
+        header_bytes = f.read(header_length)
+        if len(header_bytes) < header_length:
+            raise ValueError(f"Truncated model bundle: {path}")
+    header = json.loads(header_bytes.decode('utf-8'))
+    header['data_start'] = _align(PREAMBLE.size + header_length)
+    return header
+
+
+def load_bundle(path, mmap=True):
+    """Load a bundle; node arrays are read-only views of a shared file mapping
+
+    Returns a dict with the engine, label encoders, target encoder,
+    category cars and metadata, mirroring the pickle artifacts.
+    """
+    header = read_bundle_header(path)
+    data_start = header['data_start']
+
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        end = start + count * dtype.itemsize
+        if end > len(buffer):
+            raise ValueError(f"Truncated model bundle: {path}")
+        arrays[name] = buffer[start:end].view(dtype).reshape(spec['shape'])
+
+    engine_type = header.get('engine', 'compiled')
+    if engine_type not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine_type}' in model bundle: {path}")
+    engine = ENGINES[engine_type](max_depth=header['max_depth'], **arrays)
+
+    label_encoders = {}
+    for feature, classes in header['label_encoders'].items():
+        label_encoders[feature] = _restore_encoder(classes)
+
+    return {
+        'engine': engine,
+        'label_encoders': label_encoders,
+        'target_encoder': _restore_encoder(header['target_classes']),
+        'category_cars': header['category_cars'],
+        'metadata': header['metadata']
+    }
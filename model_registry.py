@@ -0,0 +1,308 @@
+# model_registry.py
+"""
+Model Registry Module for Automobile Recommendation System
+Stores trained model builds under a key derived from the dataset's
+contents, the training settings and the library versions, reuses a
+matching build instead of retraining and prunes the least recently
+used builds
+Author: Prathamesh Parab
+"""
+
+import argparse
+import hashlib
+import importlib.metadata
+import json
+import os
+import pickle
+import platform
+import shutil
+import time
+from training_config import DEFAULT_TRAINING_CONFIG, PARALLELISM_KEYS
+
+DEFAULT_REGISTRY_DIR = '.cache/models'
+DEFAULT_MAX_ENTRIES = 3
+
+# Bumped whenever a build's layout changes; older builds no longer match
+REGISTRY_FORMAT = 1
+
+# Libraries whose versions can change a trained model or its pickles
+KEY_LIBRARIES = ['scikit-learn', 'numpy', 'pandas']
+
+ENTRY_FILENAME = 'entry.json'
+
+# Written into the models directory by install(), naming the build it holds
+MARKER_FILENAME = 'registry.json'
+
+# Files in the models directory that install() replaces or removes
+ARTIFACT_SUFFIXES = ('.pkl', '.bundle')
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, value):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(value, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def file_stats(directory, names):
+    """(name, size, mtime) of the given files, to tell whether they were replaced"""
+    stats = []
+    for name in sorted(names):
+        stat = os.stat(os.path.join(directory, name))
+        stats.append([name, stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+class ModelRegistry:
+    def __init__(self, registry_dir=DEFAULT_REGISTRY_DIR, max_entries=DEFAULT_MAX_ENTRIES, trainer_options=None):
+        """Model builds under registry_dir, at most max_entries of them
+
+        trainer_options are extra CarModelTrainer arguments for builds
+        (cache_dir, metrics); they must not change the trained model.
+        """
+        self.registry_dir = registry_dir
+        self.max_entries = max_entries
+        self.trainer_options = trainer_options or {}
+        os.makedirs(registry_dir, exist_ok=True)
+
+    def dataset_digest(self, dataset_path):
+        """SHA-1 of the dataset, rehashed only when its size or mtime changed"""
+        digests_path = os.path.join(self.registry_dir, 'datasets.json')
+        digests = read_json(digests_path) or {}
+        source = os.path.abspath(dataset_path)
+        stat = os.stat(dataset_path)
+        known = digests.get(source)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha1']
+
+        digest = hashlib.sha1()
+        with open(dataset_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digests[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': digest.hexdigest()}
+        write_json(digests_path, digests)
+        return digest.hexdigest()
+
+    def spec(self, dataset_path, config=None):
+        """Everything a build depends on; its hash is the registry key"""
+        config = {**DEFAULT_TRAINING_CONFIG, **(config or {})}
+        return {
+            'format': REGISTRY_FORMAT,
+            'dataset_sha1': self.dataset_digest(dataset_path),
+            'config': {name: value for name, value in sorted(config.items()) if name not in PARALLELISM_KEYS},
+            'python': '.'.join(platform.python_version_tuple()[:2]),
+            'libraries': {name: importlib.metadata.version(name) for name in KEY_LIBRARIES},
+        }
+
+    @staticmethod
+    def key(spec):
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def entry_path(self, key):
+        return os.path.join(self.registry_dir, key)
+
+    def get(self, key):
+        """The registry entry for key, or None"""
+        entry = read_json(os.path.join(self.entry_path(key), ENTRY_FILENAME))
+        return entry if entry is not None and entry.get('key') == key else None
+
+    def entries(self):
+        """All entries, most recently used first"""
+        entries = []
+        for name in os.listdir(self.registry_dir):
+            entry = self.get(name) if os.path.isdir(self.entry_path(name)) else None
+            if entry is not None:
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    def touch(self, entry):
+        """Mark an entry as just used (LRU order)"""
+        entry['last_used'] = time.time()
+        write_json(os.path.join(self.entry_path(entry['key']), ENTRY_FILENAME), entry)
+
+    def build(self, dataset_path, config=None, spec=None):
+        """Train a model and store it as a new entry"""
+        from model_trainer import CarModelTrainer
+        spec = spec or self.spec(dataset_path, config)
+        key = self.key(spec)
+        build_dir = f'{self.entry_path(key)}.tmp-{os.getpid()}'
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+        start = time.perf_counter()
+        trainer = CarModelTrainer(dataset_path, config=config, **self.trainer_options)
+        trainer.prepare_data()
+        trainer.train_model()
+        trainer.save_model(build_dir)
+        build_seconds = time.perf_counter() - start
+
+        files = sorted(name for name in os.listdir(build_dir) if name.endswith(ARTIFACT_SUFFIXES))
+        now = time.time()
+        entry = {
+            'key': key,
+            'spec': spec,
+            'dataset': os.path.abspath(dataset_path),
+            'accuracy': float(trainer.accuracy),
+            'build_seconds': build_seconds,
+            'created': now,
+            'last_used': now,
+            'files': files,
+            'bytes': sum(os.path.getsize(os.path.join(build_dir, name)) for name in files),
+        }
+        write_json(os.path.join(build_dir, ENTRY_FILENAME), entry)
+
+        # Another process may have finished the same build first; either copy is fine
+        try:
+            os.rename(build_dir, self.entry_path(key))
+        except OSError:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            entry = self.get(key)
+        print(f"📦 Registered model build {key} ({build_seconds:.1f}s)")
+        return entry
+
+    def installed_key(self, models_dir):
+        """Key of the build in models_dir, if its files are still the ones installed"""
+        marker = read_json(os.path.join(models_dir, MARKER_FILENAME))
+        if marker is None:
+            return None
+        try:
+            if file_stats(models_dir, [name for name, _, _ in marker['files']]) != marker['files']:
+                return None
+        except FileNotFoundError:
+            return None
+        return marker['key']
+
+    def has_unmanaged_models(self, models_dir):
+        """True when models_dir holds artifacts that no valid registry install put there"""
+        if self.installed_key(models_dir) is not None or not os.path.isdir(models_dir):
+            return False
+        return any(name.endswith(ARTIFACT_SUFFIXES) for name in os.listdir(models_dir))
+
+    @staticmethod
+    def trained_dataset_digest(models_dir):
+        """SHA-1 of the dataset the models in models_dir were trained on, if recorded"""
+        try:
+            with open(os.path.join(models_dir, 'metadata.pkl'), 'rb') as f:
+                return pickle.load(f).get('dataset_sha1')
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            return None
+
+    def install(self, entry, models_dir):
+        """Make models_dir hold the entry's artifacts
+
+        Files are hard-linked where possible (copied otherwise) and renamed
+        into place one by one, so a running predictor can hot-reload them.
+        Only files listed by the previous install's marker are removed;
+        anything else in models_dir is left alone.
+        """
+        os.makedirs(models_dir, exist_ok=True)
+        source = self.entry_path(entry['key'])
+        previous = read_json(os.path.join(models_dir, MARKER_FILENAME)) or {'files': []}
+        for name in entry['files']:
+            tmp_path = os.path.join(models_dir, f'{name}.tmp')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            try:
+                os.link(os.path.join(source, name), tmp_path)
+            except OSError:
+                shutil.copy2(os.path.join(source, name), tmp_path)
+            os.replace(tmp_path, os.path.join(models_dir, name))
+        for name, _, _ in previous['files']:
+            if name not in entry['files'] and os.path.exists(os.path.join(models_dir, name)):
+                os.remove(os.path.join(models_dir, name))
+        write_json(os.path.join(models_dir, MARKER_FILENAME),
+                   {'key': entry['key'], 'files': file_stats(models_dir, entry['files'])})
+
+    def prune(self, keep=None):
+        """Delete the least recently used entries beyond max_entries (never `keep`)"""
+        removed = []
+        for entry in self.entries()[self.max_entries:]:
+            if entry['key'] != keep:
+                shutil.rmtree(self.entry_path(entry['key']), ignore_errors=True)
+                removed.append(entry['key'])
+        return removed
+
+    def ensure(self, dataset_path, models_dir='models', config=None, train=True, reinstall=False):
+        """Make models_dir hold the build for this dataset and config
+
+        Returns (entry, outcome), outcome being 'current' (already
+        installed), 'reused' (an earlier build was installed), 'built' or,
+        with entry None, 'missing' (train=False and no matching build) or
+        'unmanaged'. Models the registry did not install (trained or
+        updated by hand) are 'unmanaged' and kept while the dataset
+        digest saved in their metadata matches dataset_path; models
+        trained on other data, or recording none, are replaced like any
+        stale install. reinstall=True replaces them in any case.
+        """
+        stale = False
+        if not reinstall and self.has_unmanaged_models(models_dir):
+            if self.trained_dataset_digest(models_dir) == self.dataset_digest(dataset_path):
+                return None, 'unmanaged'
+            stale = True
+        spec = self.spec(dataset_path, config)
+        key = self.key(spec)
+        entry = self.get(key)
+        if entry is None and not train:
+            return None, 'missing'
+        if stale:
+            print(f"⚠️ {models_dir}/ holds models not trained on the current {os.path.basename(dataset_path)}; "
+                  f"replacing them")
+        if entry is not None and self.installed_key(models_dir) == key:
+            outcome = 'current'
+        elif entry is not None:
+            self.install(entry, models_dir)
+            outcome = 'reused'
+        else:
+            entry = self.build(dataset_path, config, spec)
+            self.install(entry, models_dir)
+            outcome = 'built'
+        self.touch(entry)
+        self.prune(keep=key)
+        return entry, outcome
+
+
+def format_entries(entries, installed=None):
+    lines = [f"{'key':18}{'accuracy':>9}{'build':>9}{'size':>9}  {'last used':20}dataset"]
+    for entry in entries:
+        mark = '*' if entry['key'] == installed else ' '
+        last_used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_used']))
+        lines.append(f"{mark}{entry['key']:17}{entry['accuracy']:>9.1%}{entry['build_seconds']:>8.1f}s"
+                     f"{entry['bytes'] / 1e6:>7.0f}MB  {last_used:20}{entry['dataset']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage stored model builds")
+    parser.add_argument('command', choices=['list', 'ensure', 'prune', 'clear'])
+    parser.add_argument('--dataset', default='cartest.csv')
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--registry-dir', default=DEFAULT_REGISTRY_DIR)
+    parser.add_argument('--keep', type=int, default=DEFAULT_MAX_ENTRIES, help="Builds kept after pruning")
+    parser.add_argument('--reinstall', action='store_true',
+                        help="Replace models the registry did not install (ensure)")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry_dir, args.keep)
+    if args.command == 'ensure':
+        entry, outcome = registry.ensure(args.dataset, args.models_dir, reinstall=args.reinstall)
+        if entry is None:
+            print(f"✓ {args.models_dir}/ holds models trained by hand on the current {args.dataset}; "
+                  f"left as is (use --reinstall to replace them)")
+        else:
+            print(f"✓ {args.models_dir}/ holds build {entry['key']} ({outcome})")
+    elif args.command == 'prune':
+        removed = registry.prune(keep=registry.installed_key(args.models_dir))
+        print(f"✓ Removed {len(removed)} build(s)")
+    elif args.command == 'clear':
+        shutil.rmtree(args.registry_dir, ignore_errors=True)
+        print(f"✓ Removed {args.registry_dir}")
+    else:
+        print(format_entries(registry.entries(), registry.installed_key(args.models_dir)))
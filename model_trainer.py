@@ -5,21 +5,82 @@ Handles all ML model training and saving
 Author: Prathamesh Parab
 """
 
+import numpy as np
 import pandas as pd
 import pickle
+import time
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import cross_val_predict
 from sklearn.preprocessing import LabelEncoder
 import os
+import tracemalloc
+from compact_forest import COMPACT_BUNDLE_FILENAME
+from dataset_cache import DEFAULT_CACHE_DIR, DatasetCache, file_digest
+from decision_table import DECISION_TABLE_FILENAME, KEY_COLUMNS, DecisionTable
+from evaluation import evaluate, format_report
+from forest_engine import CompiledForest
+from model_bundle import BUNDLE_FILENAME, write_bundle
+from metrics import default_metrics
+from similar_cars import SIMILAR_CARS_FILENAME, SimilarCarsIndex
+from training_config import ACCURACY_MODES, DEFAULT_TRAINING_CONFIG
+
+# Compact dtypes used by the streaming ingestion mode
+STREAMING_DTYPES = {
+    'Year': 'int16',
+    'price': 'float32',
+    'Fuel type': 'category',
+    'Gear box type': 'category',
+    'Manufacturer': 'category',
+    'Color': 'category',
+    'CarName': 'category',
+}
+
+def top_cars(category_counts, top_n=3):
+    """Most frequent cars per category; ties keep first-appearance order"""
+    return {category: sorted(counts, key=counts.get, reverse=True)[:top_n]
+            for category, counts in category_counts.items()}
+
+def dump_pickle(obj, path, protocol=None):
+    """Pickle via a temp file and rename, so a reloading predictor never reads a partial file"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(obj, f, protocol=protocol)
+    os.replace(temp_path, path)
 
 class CarModelTrainer:
-    def __init__(self, dataset_path='cartest.csv'):
+    def __init__(self, dataset_path='cartest.csv', config=None, metrics=None, cache_dir=DEFAULT_CACHE_DIR):
+        """cache_dir holds the dataset's column-file cache (None always parses the CSV)"""
         self.dataset_path = dataset_path
+        self.cache_dir = cache_dir
+        self.metrics = metrics or default_metrics
+        self.config = {**DEFAULT_TRAINING_CONFIG, **(config or {})}
+        if self.config['accuracy_mode'] not in ACCURACY_MODES:
+            raise ValueError(f"accuracy_mode must be one of {', '.join(ACCURACY_MODES)}")
+        self.data = None
+        self.X = None
+        self.y = None
         self.model = None
         self.label_encoders = {}
         self.target_encoder = None
         self.category_cars = {}
+        self.category_counts = {}
+        self.model_version = 1
+        self.n_samples = 0
         self.accuracy = 0
+        self.peak_memory = None
+        self.timings = {}
+        self.evaluation = None
+        self.decision_table = None
         
+    def record_timing(self, stage, start):
+        """Store the time since start in self.timings (and metrics when enabled)"""
+        now = time.perf_counter()
+        self.timings[stage] = now - start
+        if self.metrics.enabled:
+            self.metrics.observe(f'train.{stage}', now - start)
+        return now
+    
     def create_category(self, row):
         """Create simplified categories for high accuracy"""
         manufacturer = row['Manufacturer']
@@ -34,90 +95,388 @@ class CarModelTrainer:
         
         return f"{manufacturer} {price_range}"
     
-    def prepare_data(self):
-        """Load and prepare the dataset"""
+    def create_categories(self, data):
+        """Vectorized create_category over a whole frame"""
+        price_ranges = np.array(['Economy', 'Premium', 'Luxury'], dtype=object)
+        prices = data['price'].to_numpy(dtype=float)
+        tiers = np.select([prices < 25000, prices < 50000], [0, 1], 2)
+        
+        # Build each "manufacturer tier" label once, then gather by code
+        manufacturer_codes, manufacturers = pd.factorize(data['Manufacturer'].astype(str))
+        labels = np.array([f"{manufacturer} {price_range}" for manufacturer in manufacturers
+                           for price_range in price_ranges], dtype=object)
+        return pd.Series(labels[manufacturer_codes * len(price_ranges) + tiers], index=data.index)
+    
+    def fit_encoder(self, values):
+        """Fit a LabelEncoder on the distinct values only and encode by hashing
+        
+        Missing values get their own code and class, as with LabelEncoder
+        fitted on the whole column.
+        """
+        codes, _ = pd.factorize(values, use_na_sentinel=False)
+        # First row of each distinct value, in code order (keeps None/NaN as given)
+        first_rows = pd.Series(codes).drop_duplicates().index.to_numpy()
+        uniques = np.asarray(values, dtype=object)[first_rows]
+        encoder = LabelEncoder()
+        encoder.fit(uniques)
+        return encoder, encoder.transform(uniques)[codes]
+    
+    def cached_encoder(self, dataset, feature):
+        """LabelEncoder and codes taken from the cache's sorted dictionary (no refit)"""
+        encoder = LabelEncoder()
+        encoder.classes_ = dataset.categories(feature)
+        return encoder, dataset.codes(feature).astype(np.int64)
+    
+    def dataset_digest(self):
+        """SHA-1 of the dataset file as it is now (None without one)"""
+        if not self.dataset_path or not os.path.exists(self.dataset_path):
+            return None
+        return file_digest(self.dataset_path)
+
+    def load_dataset(self):
+        """Read the whole dataset; returns (frame, cached dataset or None)"""
+        if self.cache_dir is None:
+            return pd.read_csv(self.dataset_path), None
+        dataset = DatasetCache(self.cache_dir, self.metrics).load(self.dataset_path)
+        return dataset.to_frame(), dataset
+    
+    def collect_category_counts(self):
+        """Per-category CarName counts from one groupby pass, in first-appearance order"""
+        counts = self.data.groupby(['PredictionTarget', 'CarName'], sort=False).size()
+        category_counts = {category: {} for category in self.data['PredictionTarget'].unique()}
+        for (category, car), count in counts.items():
+            category_counts[category][car] = int(count)
+        return category_counts
+    
+    def collect_category_cars(self, top_n=3):
+        """Most frequent CarName values per category (counts kept in self.category_counts)"""
+        self.category_counts = self.collect_category_counts()
+        return top_cars(self.category_counts, top_n)
+    
+    def prepare_data(self, chunksize=None):
+        """Load and prepare the dataset
+        
+        The CSV is read through the dataset cache unless cache_dir is None.
+        With chunksize set, the CSV is streamed instead (see prepare_data_streaming).
+        """
+        if chunksize:
+            return self.prepare_data_streaming(chunksize)
+        
         print("📂 Loading dataset...")
-        self.data = pd.read_csv(self.dataset_path)
+        start = time.perf_counter()
+        self.data, dataset = self.load_dataset()
+        start = self.record_timing('load', start)
+        self.X = None
+        self.y = None
         
         # Create target categories
-        self.data['PredictionTarget'] = self.data.apply(self.create_category, axis=1)
+        self.data['PredictionTarget'] = self.create_categories(self.data)
         print(f"✓ Created {self.data['PredictionTarget'].nunique()} categories from {len(self.data)} records")
         
         # Encode categorical features
         categorical_features = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color']
         for feature in categorical_features:
-            self.label_encoders[feature] = LabelEncoder()
-            self.data[feature + '_encoded'] = self.label_encoders[feature].fit_transform(self.data[feature])
+            if dataset is not None and dataset.is_categorical(feature) and not dataset.has_missing(feature):
+                self.label_encoders[feature], self.data[feature + '_encoded'] = self.cached_encoder(dataset, feature)
+            else:
+                self.label_encoders[feature], self.data[feature + '_encoded'] = self.fit_encoder(self.data[feature])
         
         # Encode target
-        self.target_encoder = LabelEncoder()
-        self.data['Target_encoded'] = self.target_encoder.fit_transform(self.data['PredictionTarget'])
+        self.target_encoder, self.data['Target_encoded'] = self.fit_encoder(self.data['PredictionTarget'])
         
         # Store car examples for each category
-        for category in self.data['PredictionTarget'].unique():
-            matching_cars = self.data[self.data['PredictionTarget'] == category]['CarName'].value_counts().head(3).index.tolist()
-            self.category_cars[category] = matching_cars
+        self.category_cars = self.collect_category_cars()
+        self.record_timing('encode', start)
         
         return self.data
     
+    def prepare_data_streaming(self, chunksize=100000):
+        """Stream the dataset in chunks into a compact training matrix
+        
+        Categoricals are read as pandas categories and mapped onto vocabularies
+        that grow chunk by chunk; only small integer code arrays are kept, and
+        category/car counts are accumulated as we go. Produces self.X (float32)
+        and self.y directly, with the same encoders, categories and top cars as
+        prepare_data(); self.data is not kept.
+        """
+        print(f"📂 Streaming dataset in chunks of {chunksize:,} rows...")
+        start = time.perf_counter()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        
+        categorical_features = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color']
+        price_ranges = ['Economy', 'Premium', 'Luxury']
+        vocabularies = {feature: {} for feature in categorical_features + ['CarName']}
+        columns = {name: [] for name in ['Year', 'price', 'tier'] + categorical_features}
+        category_order = {}
+        car_counts = {}
+        n_rows = 0
+        
+        reader = pd.read_csv(self.dataset_path, usecols=list(STREAMING_DTYPES),
+                             dtype=STREAMING_DTYPES, chunksize=chunksize)
+        for chunk in reader:
+            codes = {}
+            for feature, vocabulary in vocabularies.items():
+                column = chunk[feature]
+                if column.isna().any():
+                    raise ValueError(f"Missing values in column '{feature}'")
+                # Map this chunk's categories onto the running vocabulary
+                lookup = np.array([vocabulary.setdefault(value, len(vocabulary))
+                                   for value in column.cat.categories], dtype=np.int32)
+                codes[feature] = lookup[column.cat.codes.to_numpy()]
+            
+            prices = chunk['price'].to_numpy()
+            tiers = np.select([prices < 25000, prices < 50000], [0, 1], 2).astype(np.int8)
+            
+            columns['Year'].append(chunk['Year'].to_numpy())
+            columns['price'].append(prices)
+            columns['tier'].append(tiers)
+            for feature in categorical_features:
+                columns[feature].append(codes[feature].astype(np.int16))
+            
+            # Count (manufacturer, tier, car) triples in first-appearance order
+            category_keys = codes['Manufacturer'].astype(np.int64) * len(price_ranges) + tiers
+            car_keys = category_keys * len(vocabularies['CarName']) + codes['CarName']
+            for key in pd.unique(category_keys):
+                category_order.setdefault(int(key), None)
+            key_codes, keys = pd.factorize(car_keys)
+            for key, count in zip(keys, np.bincount(key_codes)):
+                key = (int(key) // len(vocabularies['CarName']), int(key) % len(vocabularies['CarName']))
+                car_counts[key] = car_counts.get(key, 0) + int(count)
+            
+            n_rows += len(chunk)
+        
+        # Refit encoders on the final vocabularies (sorted, as LabelEncoder does)
+        remaps = {}
+        for feature in categorical_features:
+            values = list(vocabularies[feature])
+            self.label_encoders[feature] = LabelEncoder().fit(values)
+            remaps[feature] = self.label_encoders[feature].transform(values)
+        
+        # Target categories are fully determined by (manufacturer, price tier)
+        manufacturers = list(vocabularies['Manufacturer'])
+        category_labels = {key: f"{manufacturers[key // len(price_ranges)]} {price_ranges[key % len(price_ranges)]}"
+                           for key in category_order}
+        self.target_encoder = LabelEncoder().fit(list(category_labels.values()))
+        target_codes = np.zeros(len(manufacturers) * len(price_ranges), dtype=np.int32)
+        target_codes[list(category_labels)] = self.target_encoder.transform(list(category_labels.values()))
+        
+        # Assemble targets and the training matrix, freeing chunks as we go
+        manufacturer_ids = np.concatenate(columns['Manufacturer']).astype(np.int64)
+        self.y = target_codes[manufacturer_ids * len(price_ranges) + np.concatenate(columns.pop('tier'))]
+        del manufacturer_ids
+        
+        self.X = np.empty((n_rows, 6), dtype=np.float32, order='F')
+        np.concatenate(columns.pop('Year'), out=self.X[:, 0])
+        np.concatenate(columns.pop('price'), out=self.X[:, 1])
+        for column, feature in enumerate(categorical_features, start=2):
+            self.X[:, column] = remaps[feature][np.concatenate(columns.pop(feature))]
+        
+        # Top cars per category from the maintained counts
+        car_names = list(vocabularies['CarName'])
+        self.category_counts = {label: {} for label in category_labels.values()}
+        for (category_key, car), count in car_counts.items():
+            self.category_counts[category_labels[category_key]][car_names[car]] = count
+        self.category_cars = top_cars(self.category_counts)
+        
+        self.data = None
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        self.peak_memory = peak
+        self.record_timing('load_encode', start)
+        
+        print(f"✓ Created {len(category_labels)} categories from {n_rows} records")
+        print(f"✓ Peak memory during ingestion: {peak / 1e6:.1f} MB")
+        return self.X
+    
     def train_model(self):
         """Train the Random Forest model"""
         print("🤖 Training model...")
         
-        # Prepare features
-        feature_columns = ['Year', 'price', 'Fuel type_encoded', 'Gear box type_encoded', 
-                          'Manufacturer_encoded', 'Color_encoded']
-        X = self.data[feature_columns].values
-        y = self.data['Target_encoded'].values
+        # Prepare features (already built when the dataset was streamed)
+        if self.X is not None:
+            X, y = self.X, self.y
+        else:
+            feature_columns = ['Year', 'price', 'Fuel type_encoded', 'Gear box type_encoded', 
+                              'Manufacturer_encoded', 'Color_encoded']
+            X = self.data[feature_columns].values
+            y = self.data['Target_encoded'].values
+        self.n_samples = len(X)
         
         # Train model
-        self.model = RandomForestClassifier(n_estimators=100, max_depth=20, random_state=42)
+        config = self.config
+        mode = config['accuracy_mode']
+        self.model = RandomForestClassifier(n_estimators=config['n_estimators'], max_depth=config['max_depth'],
+                                            random_state=config['random_state'], n_jobs=config['n_jobs'],
+                                            oob_score=(mode == 'oob'))
+        start = time.perf_counter()
         self.model.fit(X, y)
+        start = self.record_timing('fit', start)
+        print(f"⏱️ Fit {config['n_estimators']} trees in {self.timings['fit']:.2f}s (n_jobs={config['n_jobs']})")
         
-        # Calculate accuracy
-        from sklearn.model_selection import cross_val_score
-        scores = cross_val_score(self.model, X, y, cv=5)
-        self.accuracy = scores.mean()
+        # Calculate accuracy and the evaluation report from out-of-sample predictions
+        if mode == 'oob':
+            self.accuracy = self.model.oob_score_
+            # Rows never left out of a bootstrap sample have no OOB vote
+            oob_votes = self.model.oob_decision_function_
+            scored = ~np.isnan(oob_votes).any(axis=1)
+            oob_pred = self.model.classes_.take(np.argmax(oob_votes[scored], axis=1))
+            self.evaluation = evaluate(y[scored], oob_pred, self.target_encoder.classes_)
+        else:
+            if mode == 'cv_parallel':
+                # One single-threaded forest per fold, folds spread over processes
+                cv_jobs = config['cv_jobs'] or config['cv_folds']
+                cv_pred = cross_val_predict(clone(self.model).set_params(n_jobs=1), X, y,
+                                            cv=config['cv_folds'], n_jobs=cv_jobs)
+            else:
+                cv_pred = cross_val_predict(self.model, X, y, cv=config['cv_folds'])
+            self.evaluation = evaluate(y, cv_pred, self.target_encoder.classes_)
+            self.accuracy = self.evaluation['accuracy']
+        self.record_timing('accuracy', start)
+        print(f"⏱️ Accuracy ({mode}) computed in {self.timings['accuracy']:.2f}s")
         
         print(f"✓ Model trained with {self.accuracy:.1%} accuracy")
+        if self.evaluation is not None:
+            print(format_report(self.evaluation, worst=0))
         return self.model
     
-    def save_model(self, models_dir='models'):
-        """Save the trained model and encoders"""
+    def compile_decision_table(self):
+        """Compile the trained forest into a price decision table
+        
+        Covers the year and categorical combinations seen in training;
+        predictions for other combinations fall back to the forest.
+        """
+        print("📋 Compiling decision table...")
+        start = time.perf_counter()
+        if self.X is not None:
+            combinations = np.unique(self.X[:, KEY_COLUMNS], axis=0)
+        else:
+            key_columns = ['Year', 'Fuel type_encoded', 'Gear box type_encoded',
+                           'Manufacturer_encoded', 'Color_encoded']
+            combinations = self.data[key_columns].drop_duplicates().to_numpy()
+        self.decision_table = DecisionTable.compile(self.model, combinations, self.model_version)
+        self.record_timing('decision_table', start)
+        
+        report = self.decision_table.report
+        report['table_bytes'] = self.decision_table.nbytes
+        report['model_bytes'] = len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL))
+        print(f"✓ Compiled {report['compiled']:,} of {report['combinations']:,} combinations "
+              f"into {report['intervals']:,} price intervals in {self.timings['decision_table']:.1f}s")
+        print(f"✓ Verified {report['cells_verified']:,} price cells against the forest "
+              f"({report['failed']} combinations rejected, {report['predict_mismatches']} of "
+              f"{report['predict_sample']:,} sampled predictions differ)")
+        print(f"📦 Table {report['table_bytes'] / 1e6:.2f} MB vs forest {report['model_bytes'] / 1e6:.1f} MB")
+        return self.decision_table
+    
+    def build_similar_index(self):
+        """Sorted listing index for similar-car lookups, scanned by brute force (needs self.data)"""
+        return SimilarCarsIndex.from_training_data(self.data, self.label_encoders)
+    
+    def save_model(self, models_dir='models', bundle=True, keep_similar_index=False):
+        """Save the trained model and encoders
+        
+        Writes the pickle artifacts and, unless bundle=False, the
+        single-file memory-mappable bundle that CarPredictor prefers.
+        The similar-cars index is rebuilt when the listings are in memory;
+        otherwise (streamed runs) the previous one is removed, since its
+        codes may not match the refit encoders. keep_similar_index=True
+        keeps it for callers whose encoders only gained classes.
+        A compiled decision table is saved too; a stale one is removed,
+        as is a compact bundle made from the previous model.
+        """
         if not os.path.exists(models_dir):
             os.makedirs(models_dir)
+        start = time.perf_counter()
         
         # Save main model
-        with open(f'{models_dir}/car_model.pkl', 'wb') as f:
-            pickle.dump(self.model, f)
+        dump_pickle(self.model, f'{models_dir}/car_model.pkl')
         
         # Save encoders
-        with open(f'{models_dir}/label_encoders.pkl', 'wb') as f:
-            pickle.dump(self.label_encoders, f)
-        
-        with open(f'{models_dir}/target_encoder.pkl', 'wb') as f:
-            pickle.dump(self.target_encoder, f)
+        dump_pickle(self.label_encoders, f'{models_dir}/label_encoders.pkl')
+        dump_pickle(self.target_encoder, f'{models_dir}/target_encoder.pkl')
         
         # Save category cars mapping
-        with open(f'{models_dir}/category_cars.pkl', 'wb') as f:
-            pickle.dump(self.category_cars, f)
+        dump_pickle(self.category_cars, f'{models_dir}/category_cars.pkl')
+        
+        # Save per-category car counts (lets incremental updates re-rank top cars)
+        dump_pickle(self.category_counts, f'{models_dir}/category_counts.pkl')
         
         # Save metadata
         metadata = {
             'accuracy': self.accuracy,
             'num_categories': len(self.target_encoder.classes_),
-            'features': list(self.label_encoders.keys())
+            'features': list(self.label_encoders.keys()),
+            'accuracy_mode': self.config['accuracy_mode'],
+            'model_version': self.model_version,
+            'n_samples': self.n_samples,
+            # Lets the model registry tell whether hand-trained models match the CSV
+            'dataset_sha1': self.dataset_digest()
         }
-        with open(f'{models_dir}/metadata.pkl', 'wb') as f:
-            pickle.dump(metadata, f)
+        dump_pickle(metadata, f'{models_dir}/metadata.pkl')
+        start = self.record_timing('pickle', start)
+        
+        # Save single-file bundle
+        if bundle:
+            write_bundle(f'{models_dir}/{BUNDLE_FILENAME}', CompiledForest.from_sklearn(self.model),
+                         self.label_encoders, self.target_encoder, self.category_cars, metadata)
+            start = self.record_timing('bundle', start)
+        
+        # Save similar-cars index (an old one is only valid while existing codes are unchanged)
+        index_path = f'{models_dir}/{SIMILAR_CARS_FILENAME}'
+        if self.data is not None and 'CarName' in self.data:
+            dump_pickle(self.build_similar_index(), index_path, protocol=pickle.HIGHEST_PROTOCOL)
+            start = self.record_timing('similar_index', start)
+        elif not keep_similar_index and os.path.exists(index_path):
+            os.remove(index_path)
+        
+        # A compact bundle was compacted from the previous forest (compact_model.py rebuilds it)
+        compact_path = f'{models_dir}/{COMPACT_BUNDLE_FILENAME}'
+        if os.path.exists(compact_path):
+            os.remove(compact_path)
+        
+        # Save decision table (a table compiled from an older model must not outlive it)
+        table_path = f'{models_dir}/{DECISION_TABLE_FILENAME}'
+        if self.decision_table is not None:
+            dump_pickle(self.decision_table, table_path, protocol=pickle.HIGHEST_PROTOCOL)
+        elif os.path.exists(table_path):
+            os.remove(table_path)
         
         print(f"✓ Model saved to {models_dir}/")
         return True
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the car recommendation model")
+    parser.add_argument('--dataset', default='cartest.csv', help="Training CSV")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows (compact dtypes)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Where the CSV is cached as memory-mapped column files")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the CSV")
+    parser.add_argument('--n-jobs', type=int, default=None, help="Threads used to fit the forest")
+    parser.add_argument('--accuracy-mode', choices=ACCURACY_MODES, default='cv',
+                        help="How accuracy is measured: serial CV, parallel CV or out-of-bag")
+    parser.add_argument('--decision-table', action='store_true',
+                        help="Also compile the forest into a verified price decision table")
+    parser.add_argument('--metrics-file', default=None,
+                        help="Write stage timings here (.json snapshot, otherwise Prometheus text)")
+    args = parser.parse_args()
+    if args.metrics_file:
+        default_metrics.enable()
+    
     # Train and save model
-    trainer = CarModelTrainer('cartest.csv')
-    trainer.prepare_data()
+    trainer = CarModelTrainer(args.dataset, config={'n_jobs': args.n_jobs,
+                                                    'accuracy_mode': args.accuracy_mode},
+                              cache_dir=None if args.no_cache else args.cache_dir)
+    trainer.prepare_data(chunksize=args.chunksize)
     trainer.train_model()
+    if args.decision_table:
+        trainer.compile_decision_table()
     trainer.save_model()
+    if args.metrics_file:
+        default_metrics.export(args.metrics_file)
+        print(f"✓ Metrics written to {args.metrics_file}")
     print("\n✅ Model training complete!")
\ No newline at end of file
@@ -0,0 +1,232 @@
+# model_updater.py
+"""
+Incremental Update Module for Automobile Recommendation System
+Grows extra trees on new listings with warm_start, extends the encoders
+without renumbering existing codes, re-ranks top cars from maintained
+counts and saves a new model version
+Author: Prathamesh Parab
+"""
+
+import argparse
+import os
+import pickle
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.tree._tree import Tree
+from model_trainer import CarModelTrainer, top_cars
+
+CATEGORICAL_FEATURES = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color']
+
+# Stored rows the new trees are grown on alongside the new ones
+DEFAULT_REPLAY_ROWS = 5000
+
+
+def extend_encoder(encoder, values):
+    """Append unseen values to a fitted LabelEncoder and return all codes
+
+    Existing classes keep their positions (so codes already used by the
+    forest stay valid); new classes are appended in first-appearance order.
+    """
+    lookup = {value: code for code, value in enumerate(encoder.classes_)}
+    unseen = [value for value in pd.unique(values) if value not in lookup]
+    if unseen:
+        encoder.classes_ = np.concatenate([np.asarray(encoder.classes_, dtype=object),
+                                           np.array(unseen, dtype=object)])
+        lookup.update({value: len(lookup) + i for i, value in enumerate(unseen)})
+    return pd.Series(values).map(lookup).to_numpy(dtype=np.int64), unseen
+
+
+def encode_features(label_encoders, data):
+    """Feature matrix of data, extending the encoders; returns (X, unseen values per feature)"""
+    X = np.empty((len(data), 6), dtype=np.float64)
+    X[:, 0] = data['Year'].to_numpy()
+    X[:, 1] = data['price'].to_numpy()
+    unseen = {}
+    for column, feature in enumerate(CATEGORICAL_FEATURES, start=2):
+        X[:, column], unseen[feature] = extend_encoder(label_encoders[feature], data[feature])
+    return X, unseen
+
+
+def pad_tree_classes(estimator, n_classes):
+    """Widen a fitted tree's class dimension, with zero weight for new classes"""
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    values = state['values']
+    padded = np.zeros((values.shape[0], values.shape[1], n_classes), dtype=values.dtype)
+    padded[:, :, :values.shape[2]] = values
+
+    widened = Tree(tree.n_features, np.array([n_classes], dtype=np.intp), tree.n_outputs)
+    widened.__setstate__({**state, 'values': padded})
+    estimator.tree_ = widened
+    estimator.n_classes_ = np.int64(n_classes)
+    estimator.classes_ = np.arange(n_classes, dtype=np.float64)
+
+
+class IncrementalUpdater:
+    def __init__(self, models_dir='models', dataset_path=None):
+        self.models_dir = models_dir
+        self.trainer = CarModelTrainer(dataset_path)
+        self.metadata = {}
+        self.load()
+
+    def load(self):
+        """Load the pickle artifacts (the sklearn forest is needed to grow trees)"""
+        trainer = self.trainer
+        with open(f'{self.models_dir}/car_model.pkl', 'rb') as f:
+            trainer.model = pickle.load(f)
+        with open(f'{self.models_dir}/label_encoders.pkl', 'rb') as f:
+            trainer.label_encoders = pickle.load(f)
+        with open(f'{self.models_dir}/target_encoder.pkl', 'rb') as f:
+            trainer.target_encoder = pickle.load(f)
+        with open(f'{self.models_dir}/category_cars.pkl', 'rb') as f:
+            trainer.category_cars = pickle.load(f)
+        with open(f'{self.models_dir}/metadata.pkl', 'rb') as f:
+            self.metadata = pickle.load(f)
+
+        counts_path = f'{self.models_dir}/category_counts.pkl'
+        if os.path.exists(counts_path):
+            with open(counts_path, 'rb') as f:
+                trainer.category_counts = pickle.load(f)
+        else:
+            # Older models have no counts: seed from the dataset once
+            if not trainer.dataset_path:
+                raise FileNotFoundError("category_counts.pkl not found; pass dataset_path to rebuild counts")
+            print("⚠️ No category counts saved with this model, rebuilding them from the dataset...")
+            data, _ = trainer.load_dataset()
+            data['PredictionTarget'] = trainer.create_categories(data)
+            trainer.data = data
+            trainer.category_counts = trainer.collect_category_counts()
+            trainer.data = None
+
+        trainer.accuracy = self.metadata['accuracy']
+        trainer.config['accuracy_mode'] = self.metadata.get('accuracy_mode', 'cv')
+        trainer.model_version = self.metadata.get('model_version', 1)
+        trainer.n_samples = self.metadata.get('n_samples', 0)
+
+    def replay_sample(self, n_rows):
+        """Random sample of up to n_rows stored records (None without a dataset)"""
+        trainer = self.trainer
+        if not n_rows or not trainer.dataset_path or not os.path.exists(trainer.dataset_path):
+            return None
+        stored, _ = trainer.load_dataset()
+        if len(stored) > n_rows:
+            stored = stored.sample(n=n_rows, random_state=trainer.config['random_state'])
+        return stored
+
+    def update(self, new_data, n_new_trees=None, append_to_dataset=True, replay_rows=DEFAULT_REPLAY_ROWS):
+        """Grow the forest on new listings and save the next model version
+
+        new_data is a CSV path or DataFrame with the dataset's columns. The
+        new trees are grown on the new records plus up to replay_rows stored
+        ones, so they model the old categories as well. By default the number
+        of new trees is proportional to the new records' share of all
+        training records, so a small batch of listings cannot outvote the
+        existing forest. A batch that brings new categories instead replaces
+        just over half of the forest: old trees never vote for a new
+        category, so the new trees must outnumber them.
+        """
+        trainer = self.trainer
+        model = trainer.model
+        data = pd.read_csv(new_data) if isinstance(new_data, str) else new_data.copy()
+        print(f"📂 Updating model v{trainer.model_version} with {len(data)} new records...")
+
+        # Extend encoders in place; existing codes never change
+        X, unseen = encode_features(trainer.label_encoders, data)
+        for feature, values in unseen.items():
+            if values:
+                print(f"   + new {feature} values: {', '.join(map(str, values))}")
+
+        categories = trainer.create_categories(data)
+        y, new_categories = extend_encoder(trainer.target_encoder, categories)
+        n_classes = len(trainer.target_encoder.classes_)
+
+        # Test-then-train: score the current model on the new rows first
+        previous_accuracy = float(np.mean(model.predict(X) == y))
+        print(f"   Current model on new records: {previous_accuracy:.1%}")
+
+        # Old trees learn nothing about new categories; give them zero columns
+        if new_categories:
+            print(f"   + new categories: {', '.join(new_categories)}")
+            for estimator in model.estimators_:
+                pad_tree_classes(estimator, n_classes)
+
+        # Stored records keep the new trees from forgetting the old categories
+        replay = self.replay_sample(replay_rows)
+        if replay is not None:
+            X_replay, _ = encode_features(trainer.label_encoders, replay)
+            y_replay, _ = extend_encoder(trainer.target_encoder, trainer.create_categories(replay))
+            print(f"   Replaying {len(replay)} stored records")
+        else:
+            X_replay, y_replay = np.empty((0, X.shape[1])), np.empty(0, dtype=np.int64)
+
+        # Zero-weight anchor rows make every class present in y, so sklearn
+        # keeps the full class list; the tree builder skips zero-weight rows
+        anchors = np.repeat(X[:1], n_classes, axis=0)
+        X_fit = np.vstack([X, X_replay, anchors])
+        y_fit = np.concatenate([y, y_replay, np.arange(n_classes)])
+        sample_weight = np.concatenate([np.ones(len(X) + len(X_replay)), np.zeros(n_classes)])
+
+        n_trees = len(model.estimators_)
+        n_retired = 0
+        if n_new_trees is None:
+            if new_categories:
+                n_new_trees = n_retired = n_trees // 2 + 1
+            elif trainer.n_samples:
+                n_new_trees = max(1, round(n_trees * len(data) / trainer.n_samples))
+            else:
+                n_new_trees = 10
+
+        start = time.perf_counter()
+        model.estimators_ = model.estimators_[n_retired:]
+        model.set_params(warm_start=True, oob_score=False, n_estimators=n_trees - n_retired + n_new_trees)
+        with warnings.catch_warnings():
+            # The anchors count as samples, so small batches trip sklearn's class-count check
+            warnings.filterwarnings('ignore', message='The number of unique classes is greater than 50%')
+            model.fit(X_fit, y_fit, sample_weight=sample_weight)
+        model.set_params(warm_start=False)
+        retired = f", retired the {n_retired} oldest" if n_retired else ""
+        print(f"⏱️ Grew {n_new_trees} trees in {time.perf_counter() - start:.2f}s{retired} "
+              f"({n_trees} -> {len(model.estimators_)})")
+
+        # Re-rank top cars from maintained counts (no rescan of old data)
+        for category, car in zip(categories, data['CarName']):
+            counts = trainer.category_counts.setdefault(category, {})
+            counts[car] = counts.get(car, 0) + 1
+        touched = {category: trainer.category_counts[category] for category in pd.unique(categories)}
+        trainer.category_cars.update(top_cars(touched))
+
+        if append_to_dataset and trainer.dataset_path:
+            columns = pd.read_csv(trainer.dataset_path, nrows=0).columns
+            data[list(columns)].to_csv(trainer.dataset_path, mode='a', header=False, index=False)
+            print(f"   Appended {len(data)} records to {trainer.dataset_path}")
+
+        trainer.n_samples += len(data)
+        trainer.model_version += 1
+        # Encoders were only extended, so the similar-cars index's codes still hold
+        trainer.save_model(self.models_dir, keep_similar_index=True)
+        print(f"✓ Saved model v{trainer.model_version}")
+        return {
+            'model_version': trainer.model_version,
+            'new_records': len(data),
+            'new_categories': new_categories,
+            'previous_accuracy': previous_accuracy,
+            'n_estimators': len(model.estimators_)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally update the car recommendation model")
+    parser.add_argument('new_data', help="CSV of new listings (same columns as the dataset)")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--dataset', default='cartest.csv', help="Dataset to append the new listings to")
+    parser.add_argument('--trees', type=int, default=None,
+                        help="Trees to grow on the new data (default: proportional to its share of all records)")
+    parser.add_argument('--no-append', action='store_true', help="Do not append the listings to the dataset")
+    parser.add_argument('--replay-rows', type=int, default=DEFAULT_REPLAY_ROWS,
+                        help="Stored records the new trees are also grown on (0 for none)")
+    args = parser.parse_args()
+    IncrementalUpdater(args.models_dir, args.dataset).update(args.new_data, args.trees,
+                                                             append_to_dataset=not args.no_append,
+                                                             replay_rows=args.replay_rows)
@@ -5,50 +5,229 @@ Handles all prediction logic
 Author: Prathamesh Parab
 """
 
+import hashlib
 import pickle
 import numpy as np
+import pandas as pd
 import os
+import threading
+import time
+from compact_forest import COMPACT_BUNDLE_FILENAME
+from decision_table import DECISION_TABLE_FILENAME
+from forest_engine import CompiledForest, top_k_classes
+from model_bundle import BUNDLE_FILENAME, load_bundle
+from prediction_cache import PredictionCache
+from metrics import default_metrics
+from similar_cars import SIMILAR_CARS_FILENAME
 
-class CarPredictor:
-    def __init__(self, models_dir='models'):
-        self.models_dir = models_dir
-        self.model = None
-        self.label_encoders = {}
-        self.target_encoder = None
-        self.category_cars = {}
-        self.metadata = {}
-        self.load_models()
+# Input columns accepted by predict_batch (same names as the dataset)
+INPUT_COLUMNS = ['Year', 'price', 'Fuel type', 'Gear box type', 'Manufacturer', 'Color']
+
+# Categorical features in model column order, with their validation messages
+CATEGORICAL_FEATURES = {
+    'Fuel type': "Invalid fuel type",
+    'Gear box type': "Invalid transmission type",
+    'Manufacturer': "Invalid manufacturer",
+    'Color': "Invalid color",
+}
+
+DEFAULT_CARS = ["Model based on your preferences"]
+
+# Files whose changes trigger a reload when watching the models directory
+MODEL_ARTIFACTS = [BUNDLE_FILENAME, COMPACT_BUNDLE_FILENAME, 'car_model.pkl', 'label_encoders.pkl',
+                   'target_encoder.pkl', 'category_cars.pkl', 'metadata.pkl', SIMILAR_CARS_FILENAME,
+                   DECISION_TABLE_FILENAME]
+
+
+def artifact_fingerprint(models_dir):
+    """(name, size, mtime) of every model artifact present, used to detect new models"""
+    fingerprint = []
+    for name in MODEL_ARTIFACTS:
+        try:
+            stat = os.stat(f'{models_dir}/{name}')
+        except FileNotFoundError:
+            continue
+        fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def as_float(value):
+    """value as a float, or NaN when it is not a number (or too large for a float)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return np.nan
+
+
+def numeric_column(column):
+    """Column as a float array; values that are not numbers become NaN (invalid rows)"""
+    try:
+        return pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+    except (TypeError, ValueError, OverflowError):
+        # An int too large for a float (or another odd value) in an object column
+        return np.fromiter((as_float(value) for value in column), dtype=float, count=len(column))
+
+
+class ModelSnapshot:
+    def __init__(self, model, engine, label_encoders, target_encoder, category_cars, metadata,
+                 similar_index=None, decision_table=None, cache_size=0, source=None, fingerprint=()):
+        """One loaded set of artifacts with its lookup tables and prediction cache
+        
+        A snapshot is never modified after it is built; reloading builds a
+        new one, so a prediction that started on a snapshot finishes on it.
+        """
+        self.model = model
+        self.engine = engine
+        self.label_encoders = label_encoders
+        self.target_encoder = target_encoder
+        self.category_cars = category_cars
+        self.metadata = metadata
+        self.similar_index = similar_index
+        self.decision_table = decision_table
+        self.cache = PredictionCache(cache_size) if cache_size > 0 else None
+        self.source = source
+        self.fingerprint = fingerprint
+        digest = hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()[:8]
+        self.version = f"v{metadata.get('model_version', 1)}-{digest}"
+        self.loaded_at = time.time()
+        self.load_seconds = None
+        self.build_lookup_tables()
     
-    def load_models(self):
-        """Load all saved models and encoders"""
+    @classmethod
+    def load(cls, models_dir, compact=False, bundle=True, cache_size=0):
+        """Read the artifacts in models_dir
+        
+        A single-file bundle (memory-mapped) is preferred when present;
+        otherwise the separate pickle artifacts are read.
+        """
+        fingerprint = artifact_fingerprint(models_dir)
+        bundle_path = f'{models_dir}/{BUNDLE_FILENAME}'
+        compact_path = f'{models_dir}/{COMPACT_BUNDLE_FILENAME}'
+        compact_artifacts = cls.load_compact_bundle(models_dir) if compact else None
+        if compact_artifacts is not None:
+            artifacts = compact_artifacts
+            artifacts['model'] = None
+            source = compact_path
+        elif bundle and os.path.exists(bundle_path):
+            artifacts = load_bundle(bundle_path)
+            artifacts['model'] = None
+            source = bundle_path
+        else:
+            artifacts = cls.load_pickles(models_dir)
+            artifacts['engine'] = cls.compile_engine(artifacts['model'])
+            source = f'{models_dir}/car_model.pkl'
+        
+        decision_table = cls.load_decision_table(models_dir, artifacts['engine'] or artifacts['model'],
+                                                 artifacts['metadata'])
+        return cls(similar_index=cls.load_similar_index(models_dir), decision_table=decision_table,
+                   cache_size=cache_size, source=source, fingerprint=fingerprint, **artifacts)
+    
+    @staticmethod
+    def load_compact_bundle(models_dir):
+        """The compact bundle's artifacts, or None if absent or built from another model
+        
+        compact_model.py copies metadata.pkl into the compact bundle, so a
+        retrained or updated model (new metadata) no longer matches it.
+        """
+        compact_path = f'{models_dir}/{COMPACT_BUNDLE_FILENAME}'
+        if not os.path.exists(compact_path):
+            return None
+        artifacts = load_bundle(compact_path)
         try:
-            # Load main model
-            with open(f'{self.models_dir}/car_model.pkl', 'rb') as f:
-                self.model = pickle.load(f)
-            
-            # Load encoders
-            with open(f'{self.models_dir}/label_encoders.pkl', 'rb') as f:
-                self.label_encoders = pickle.load(f)
-            
-            with open(f'{self.models_dir}/target_encoder.pkl', 'rb') as f:
-                self.target_encoder = pickle.load(f)
-            
-            # Load category cars mapping
-            with open(f'{self.models_dir}/category_cars.pkl', 'rb') as f:
-                self.category_cars = pickle.load(f)
-            
-            # Load metadata
-            with open(f'{self.models_dir}/metadata.pkl', 'rb') as f:
-                self.metadata = pickle.load(f)
-            
-            print(f"✓ Models loaded successfully (Accuracy: {self.metadata['accuracy']:.1%})")
-            
+            with open(f'{models_dir}/metadata.pkl', 'rb') as f:
+                metadata = pickle.load(f)
         except FileNotFoundError:
-            print("❌ Model files not found! Please run model_trainer.py first.")
-            raise
+            metadata = None
+        if metadata is not None and artifacts['metadata'] != metadata:
+            print(f"⚠️ Ignoring {COMPACT_BUNDLE_FILENAME}: it was built from a different model "
+                  f"(re-run compact_model.py)")
+            return None
+        return artifacts
     
-    def validate_input(self, year, price, fuel_type, gear_type, manufacturer, color):
-        """Validate user inputs"""
+    @staticmethod
+    def load_pickles(models_dir):
+        """Load the separate pickle artifacts written by CarModelTrainer"""
+        artifacts = {}
+        for name, filename in [('model', 'car_model'), ('label_encoders', 'label_encoders'),
+                               ('target_encoder', 'target_encoder'), ('category_cars', 'category_cars'),
+                               ('metadata', 'metadata')]:
+            with open(f'{models_dir}/{filename}.pkl', 'rb') as f:
+                artifacts[name] = pickle.load(f)
+        return artifacts
+    
+    @staticmethod
+    def load_similar_index(models_dir):
+        """Load the optional similar-cars index saved with the models"""
+        index_path = f'{models_dir}/{SIMILAR_CARS_FILENAME}'
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, 'rb') as f:
+            return pickle.load(f)
+    
+    @staticmethod
+    def load_decision_table(models_dir, forest, metadata):
+        """Load the optional decision table, unless it was compiled from another model"""
+        table_path = f'{models_dir}/{DECISION_TABLE_FILENAME}'
+        if not os.path.exists(table_path):
+            return None
+        with open(table_path, 'rb') as f:
+            table = pickle.load(f)
+        if hasattr(forest, 'n_nodes'):
+            n_nodes = forest.n_nodes
+        else:
+            n_nodes = sum(estimator.tree_.node_count for estimator in forest.estimators_)
+        if table.n_nodes != n_nodes or table.model_version != metadata.get('model_version', 1):
+            print("⚠️ Decision table does not match the model, using the forest")
+            return None
+        return table
+    
+    @staticmethod
+    def compile_engine(model):
+        """Flatten the forest into the array engine, falling back to sklearn"""
+        try:
+            return CompiledForest.from_sklearn(model)
+        except (AttributeError, ValueError) as e:
+            print(f"⚠️ Forest engine unavailable, using sklearn predict: {e}")
+            return None
+    
+    def build_lookup_tables(self):
+        """Precompute dict-based encoders and decoders from the loaded LabelEncoders"""
+        self.feature_encoders = {
+            feature: {value: code for code, value in enumerate(self.label_encoders[feature].classes_)}
+            for feature in CATEGORICAL_FEATURES
+        }
+        self.target_decoder = dict(enumerate(self.target_encoder.classes_))
+        # Category name and top cars per predict_proba column
+        classes = self.engine.classes if self.engine is not None else self.model.classes_
+        self.column_categories = [self.target_decoder[code] for code in classes]
+        self.column_codes = [int(code) for code in classes]
+        self.column_cars = [self.category_cars.get(category, DEFAULT_CARS)[:3]
+                            for category in self.column_categories]
+    
+    def validate(self):
+        """Check that the artifacts fit together and can score a probe row
+        
+        Raises ValueError, so half-written or mismatched artifacts are
+        rejected before they replace a working model.
+        """
+        if 'accuracy' not in self.metadata:
+            raise ValueError("Model metadata has no accuracy")
+        for feature in CATEGORICAL_FEATURES:
+            if len(self.label_encoders[feature].classes_) == 0:
+                raise ValueError(f"Empty label encoder for {feature}")
+        
+        n_columns = len(self.column_codes)
+        probe = [2015, 20000] + [0] * len(CATEGORICAL_FEATURES)
+        model = self.engine if self.engine is not None else self.model
+        for proba in (self.predict_proba_one(probe), model.predict_proba(np.array([probe], dtype=float))[0]):
+            if proba.shape != (n_columns,) or not np.all(np.isfinite(proba)) or abs(proba.sum() - 1) > 1e-6:
+                raise ValueError("Model failed the probe prediction")
+    
+    def encode_input(self, year, price, fuel_type, gear_type, manufacturer, color):
+        """Validate and encode user inputs with one lookup per categorical field
+        
+        Returns (features, errors); features is None when there are errors.
+        """
         errors = []
         
         # Year validation
@@ -59,70 +238,476 @@ class CarPredictor:
         if price < 5000 or price > 200000:
             errors.append("Price must be between $5,000-200,000")
         
-        # Check if categorical values exist
-        if fuel_type not in self.label_encoders['Fuel type'].classes_:
-            errors.append(f"Invalid fuel type: {fuel_type}")
+        # Look up categorical values (validation and encoding in one step)
+        features = [year, price]
+        values = (fuel_type, gear_type, manufacturer, color)
+        for (feature, message), value in zip(CATEGORICAL_FEATURES.items(), values):
+            # Encoder keys are strings; anything else (even unhashable) is invalid
+            code = self.feature_encoders[feature].get(value) if isinstance(value, str) else None
+            if code is None:
+                errors.append(f"{message}: {value}")
+            features.append(code)
         
-        if gear_type not in self.label_encoders['Gear box type'].classes_:
-            errors.append(f"Invalid transmission type: {gear_type}")
+        if errors:
+            return None, errors
+        return features, errors
+    
+    def predict_proba_one(self, features):
+        """Class probabilities for one encoded feature row"""
+        if self.engine is not None:
+            return self.engine.predict_proba_one(features)
+        return self.model.predict_proba(np.array([features]))[0]
+    
+    def predict_label(self, features):
+        """Class label for one encoded row: decision table first, then the forest"""
+        if self.decision_table is not None:
+            label = self.decision_table.lookup(features)
+            if label is not None:
+                return label
+        return self.column_codes[int(np.argmax(self.predict_proba_one(features)))]
+    
+    def format_result(self, indices, probabilities):
+        """Build a success result from one row of top-k columns and probabilities (lists)"""
+        top_categories = [{
+            'category': self.column_categories[index],
+            'probability': probability,
+            'recommended_cars': self.column_cars[index]
+        } for index, probability in zip(indices, probabilities)]
+        best = top_categories[0]
+        return {
+            'success': True,
+            'category': best['category'],
+            'recommended_cars': best['recommended_cars'],
+            'confidence': best['probability'],
+            'model_accuracy': self.metadata['accuracy'],
+            'top_categories': top_categories
+        }
+    
+    def find_similar(self, features, k=5, category_code=None):
+        """Nearest listings to an encoded feature row, optionally within one encoded category"""
+        codes = dict(zip(CATEGORICAL_FEATURES, features[2:]))
+        return self.similar_index.query(features[0], features[1], codes, k, category_code)
+
+
+class CarPredictor:
+    def __init__(self, models_dir='models', cache_size=0, price_quantum=None, metrics=None, top_k=3,
+                 similar_k=0, compact=False, bundle=True):
+        """Load the models; cache_size > 0 enables the LRU prediction cache
         
-        if manufacturer not in self.label_encoders['Manufacturer'].classes_:
-            errors.append(f"Invalid manufacturer: {manufacturer}")
+        price_quantum rounds prices to the nearest multiple before predicting,
+        so nearby prices share cache entries (and predictions). Stage timings
+        and counters go to `metrics` (the shared registry by default). top_k
+        is the default number of alternative categories returned per car;
+        similar_k > 0 adds that many nearest listings from the predicted
+        category to every predict() result. compact=True loads the compact
+        majority-vote forest written by compact_model.py, when present;
+        bundle=False always reads the pickle artifacts instead.
+        """
+        self.models_dir = models_dir
+        self.compact = compact
+        self.bundle = bundle
+        self.top_k = top_k
+        self.similar_k = similar_k
+        self.metrics = metrics or default_metrics
+        self.cache_size = cache_size
+        self.price_quantum = price_quantum
+        self.snapshot = None
+        self.reloads = 0
+        self.last_reload_error = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = None
+        self.load_models()
+    
+    # Artifacts of the active snapshot
+    @property
+    def model(self):
+        return self.snapshot.model
+    
+    @property
+    def engine(self):
+        return self.snapshot.engine
+    
+    @property
+    def label_encoders(self):
+        return self.snapshot.label_encoders
+    
+    @property
+    def target_encoder(self):
+        return self.snapshot.target_encoder
+    
+    @property
+    def category_cars(self):
+        return self.snapshot.category_cars
+    
+    @property
+    def metadata(self):
+        return self.snapshot.metadata
+    
+    @property
+    def similar_index(self):
+        return self.snapshot.similar_index
+    
+    @property
+    def cache(self):
+        return self.snapshot.cache
+    
+    def read_models(self):
+        """Load and validate a new snapshot of the artifacts in models_dir"""
+        snapshot = ModelSnapshot.load(self.models_dir, self.compact, self.bundle, self.cache_size)
+        snapshot.validate()
+        return snapshot
+    
+    def activate(self, snapshot, start):
+        """Make a loaded snapshot the active model
         
-        if color not in self.label_encoders['Color'].classes_:
-            errors.append(f"Invalid color: {color}")
+        This is a single reference assignment: predictions already running
+        keep the snapshot they started with.
+        """
+        snapshot.load_seconds = time.perf_counter() - start
+        self.snapshot = snapshot
+    
+    def load_models(self):
+        """Load all saved models and encoders"""
+        start = time.perf_counter()
+        try:
+            snapshot = self.read_models()
+        except FileNotFoundError:
+            print("❌ Model files not found! Please run model_trainer.py first.")
+            raise
+        self.activate(snapshot, start)
+        if self.metrics.enabled:
+            self.metrics.observe('predictor.load', snapshot.load_seconds)
+        print(f"✓ Models loaded successfully (Accuracy: {self.metadata['accuracy']:.1%})")
+    
+    def reload(self):
+        """Load the current artifacts and swap them in; returns True on success
         
+        Loading and validation happen before the swap. If the new artifacts
+        are missing, corrupt or half-written, the active model stays in use
+        and the error is kept in last_reload_error.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            try:
+                snapshot = self.read_models()
+            except Exception as e:
+                self.last_reload_error = f"{type(e).__name__}: {e}"
+                if self.metrics.enabled:
+                    self.metrics.inc('model_reloads_total', status='failed')
+                print(f"❌ Model reload failed, keeping {self.snapshot.version}: {self.last_reload_error}")
+                return False
+            
+            previous = self.snapshot.version
+            self.activate(snapshot, start)
+            self.reloads += 1
+            self.last_reload_error = None
+            if self.metrics.enabled:
+                self.metrics.observe('predictor.reload', snapshot.load_seconds)
+                self.metrics.inc('model_reloads_total', status='ok')
+            print(f"✓ Model reloaded in {snapshot.load_seconds:.2f}s: {previous} -> {snapshot.version} "
+                  f"(Accuracy: {snapshot.metadata['accuracy']:.1%})")
+            return True
+    
+    def reload_async(self):
+        """Reload on a background thread (predictions continue meanwhile)"""
+        thread = threading.Thread(target=self.reload, name='model-reload', daemon=True)
+        thread.start()
+        return thread
+    
+    def artifacts_changed(self):
+        """True when the files in models_dir differ from the active snapshot's"""
+        return artifact_fingerprint(self.models_dir) != self.snapshot.fingerprint
+    
+    def watch(self, interval=2.0):
+        """Reload in the background whenever the model artifacts change
+        
+        The directory is polled every `interval` seconds; a change is
+        picked up once the files have stayed the same for one interval,
+        so artifacts still being written are not loaded.
+        """
+        self.stop_watching()
+        self._stop_watching = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, args=(interval, self._stop_watching),
+                                         name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+    
+    def stop_watching(self):
+        if self._stop_watching is not None:
+            self._stop_watching.set()
+            self._watcher = None
+            self._stop_watching = None
+    
+    def _watch(self, interval, stopped):
+        seen = self.snapshot.fingerprint
+        previous = seen
+        while not stopped.wait(interval):
+            current = artifact_fingerprint(self.models_dir)
+            if current and current != seen and current == previous:
+                # Rejected artifacts are not retried until they change again
+                seen = current
+                if current != self.snapshot.fingerprint:
+                    self.reload()
+            previous = current
+    
+    def model_info(self):
+        """Active model version and reload status"""
+        snapshot = self.snapshot
+        return {
+            'version': snapshot.version,
+            'model_version': snapshot.metadata.get('model_version', 1),
+            'source': snapshot.source,
+            'accuracy': snapshot.metadata['accuracy'],
+            'loaded_at': snapshot.loaded_at,
+            'load_seconds': snapshot.load_seconds,
+            'reloads': self.reloads,
+            'last_reload_error': self.last_reload_error
+        }
+    
+    def encode_input(self, year, price, fuel_type, gear_type, manufacturer, color):
+        """Validate and encode user inputs with the active model's encoders"""
+        return self.snapshot.encode_input(year, price, fuel_type, gear_type, manufacturer, color)
+    
+    def validate_input(self, year, price, fuel_type, gear_type, manufacturer, color):
+        """Validate user inputs"""
+        _, errors = self.encode_input(year, price, fuel_type, gear_type, manufacturer, color)
         return errors
     
-    def predict(self, year, price, fuel_type, gear_type, manufacturer, color):
-        """Make a car recommendation"""
+    def predict(self, year, price, fuel_type, gear_type, manufacturer, color, top_k=None):
+        """Make a car recommendation
+        
+        confidence is the forest's probability for the returned category;
+        top_categories lists the top_k most likely categories with their cars.
+        """
+        snapshot = self.snapshot
+        metrics = self.metrics
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter()
+            metrics.inc('predictions_total', mode='single')
         
-        # Validate inputs
-        errors = self.validate_input(year, price, fuel_type, gear_type, manufacturer, color)
+        # Validate and encode inputs
+        features, errors = snapshot.encode_input(year, price, fuel_type, gear_type, manufacturer, color)
+        if timing:
+            start = metrics.lap('predict.encode', start)
         if errors:
+            if timing:
+                for error in errors:
+                    metrics.inc('prediction_errors_total', type=error.split(':', 1)[0])
             return {
                 'success': False,
                 'errors': errors
             }
         
+        if self.price_quantum:
+            features[1] = round(price / self.price_quantum) * self.price_quantum
+        
         try:
-            # Encode inputs
-            fuel_encoded = self.label_encoders['Fuel type'].transform([fuel_type])[0]
-            gear_encoded = self.label_encoders['Gear box type'].transform([gear_type])[0]
-            manufacturer_encoded = self.label_encoders['Manufacturer'].transform([manufacturer])[0]
-            color_encoded = self.label_encoders['Color'].transform([color])[0]
-            
-            # Prepare features
-            features = np.array([[year, price, fuel_encoded, gear_encoded, 
-                                 manufacturer_encoded, color_encoded]])
-            
-            # Make prediction
-            prediction_encoded = self.model.predict(features)[0]
-            prediction_category = self.target_encoder.inverse_transform([prediction_encoded])[0]
-            
-            # Get specific car recommendations
-            specific_cars = self.category_cars.get(prediction_category, 
-                                                   ["Model based on your preferences"])
-            
-            return {
-                'success': True,
-                'category': prediction_category,
-                'recommended_cars': specific_cars[:3],
-                'confidence': self.metadata['accuracy']
-            }
+            # Make prediction (memoized on the encoded feature tuple)
+            cache = snapshot.cache
+            key = tuple(features)
+            proba = cache.get(key) if cache is not None else None
+            if timing and cache is not None:
+                metrics.inc('cache_hits_total' if proba is not None else 'cache_misses_total')
+                start = metrics.lap('predict.cache', start)
+            if proba is None:
+                proba = snapshot.predict_proba_one(features)
+                if cache is not None:
+                    cache.put(key, proba)
+                if timing:
+                    start = metrics.lap('predict.forest', start)
             
+            # Top categories and their specific car recommendations
+            indices, probabilities = top_k_classes(proba, top_k or self.top_k)
+            result = snapshot.format_result(indices[0].tolist(), probabilities[0].tolist())
+            if self.similar_k and snapshot.similar_index is not None:
+                result['similar_cars'] = snapshot.find_similar(features, self.similar_k,
+                                                               snapshot.column_codes[indices[0, 0]])
+            if timing:
+                metrics.lap('predict.decode', start)
+            return result
+        
         except Exception as e:
+            if timing:
+                metrics.inc('prediction_errors_total', type=type(e).__name__)
             return {
                 'success': False,
                 'errors': [str(e)]
             }
     
+    def predict_category(self, year, price, fuel_type, gear_type, manufacturer, color):
+        """Category-only recommendation through the decision table
+        
+        A compiled combination costs a dict lookup and a bisect; others
+        (or models without a table) use the forest. The result is
+        predict()'s without confidence and top_categories.
+        """
+        snapshot = self.snapshot
+        if self.metrics.enabled:
+            self.metrics.inc('predictions_total', mode='category')
+        features, errors = snapshot.encode_input(year, price, fuel_type, gear_type, manufacturer, color)
+        if errors:
+            return {
+                'success': False,
+                'errors': errors
+            }
+        if self.price_quantum:
+            features[1] = round(price / self.price_quantum) * self.price_quantum
+        
+        category = snapshot.target_decoder[snapshot.predict_label(features)]
+        return {
+            'success': True,
+            'category': category,
+            'recommended_cars': snapshot.category_cars.get(category, DEFAULT_CARS)[:3],
+            'model_accuracy': snapshot.metadata['accuracy']
+        }
+    
+    def similar_cars(self, year, price, fuel_type, gear_type, manufacturer, color, k=5, same_category=True):
+        """The k training listings most similar to a car
+        
+        With same_category, only listings of the car's predicted category
+        are searched. Returns a result dict like predict().
+        """
+        snapshot = self.snapshot
+        if snapshot.similar_index is None:
+            return {
+                'success': False,
+                'errors': ["Similar-cars index not found! Please retrain with model_trainer.py."]
+            }
+        features, errors = snapshot.encode_input(year, price, fuel_type, gear_type, manufacturer, color)
+        if errors:
+            return {
+                'success': False,
+                'errors': errors
+            }
+        
+        category_code = None
+        if same_category:
+            proba = snapshot.predict_proba_one(features)
+            category_code = snapshot.column_codes[int(np.argmax(proba))]
+        return {
+            'success': True,
+            'similar_cars': snapshot.find_similar(features, k, category_code)
+        }
+    
+    def predict_batch(self, cars, top_k=None):
+        """Make car recommendations for a batch of cars in one pass
+        
+        `cars` is a DataFrame or a dict of columns keyed by INPUT_COLUMNS.
+        Returns one result dict per row, in input order, with the same
+        shape as predict(). Invalid rows get their own errors and do not
+        stop the rest of the batch.
+        """
+        if isinstance(cars, pd.DataFrame):
+            data = cars
+        else:
+            try:
+                data = pd.DataFrame(cars)
+            except OverflowError:
+                # A huge int cannot be inferred as a number; keep the values and fail only its row
+                data = pd.DataFrame(cars, dtype=object)
+        missing = [column for column in INPUT_COLUMNS if column not in data.columns]
+        if missing:
+            raise ValueError(f"Missing input columns: {', '.join(missing)}")
+        
+        snapshot = self.snapshot
+        n_rows = len(data)
+        metrics = self.metrics
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter()
+            metrics.inc('predictions_total', n_rows, mode='batch')
+        years = numeric_column(data['Year'])
+        prices = numeric_column(data['price'])
+        
+        # Validate inputs column by column (NaN fails both range checks)
+        checks = [
+            (~((years >= 2005) & (years <= 2024)), "Year must be between 2005-2024", None),
+            (~((prices >= 5000) & (prices <= 200000)), "Price must be between $5,000-200,000", None),
+        ]
+        categorical_codes = {}
+        for feature, message in CATEGORICAL_FEATURES.items():
+            values = data[feature].to_numpy(dtype=object)
+            # Only strings can match; other values (lists, dicts, numbers) fail their own row
+            is_text = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=n_rows)
+            codes = np.full(n_rows, np.nan)
+            codes[is_text] = pd.Series(values[is_text]).map(snapshot.feature_encoders[feature]).to_numpy(dtype=float)
+            categorical_codes[feature] = codes
+            checks.append((np.isnan(codes), message, values))
+        
+        invalid = np.zeros(n_rows, dtype=bool)
+        for failed, _, _ in checks:
+            invalid |= failed
+        if timing:
+            for failed, message, _ in checks:
+                n_failed = int(failed.sum())
+                if n_failed:
+                    metrics.inc('prediction_errors_total', n_failed, type=message)
+        
+        results = [None] * n_rows
+        for i in np.flatnonzero(invalid):
+            errors = []
+            for failed, message, values in checks:
+                if failed[i]:
+                    errors.append(message if values is None else f"{message}: {values[i]}")
+            results[i] = {
+                'success': False,
+                'errors': errors
+            }
+        
+        valid_rows = np.flatnonzero(~invalid)
+        if timing:
+            start = metrics.lap('predict_batch.encode', start)
+        if len(valid_rows) == 0:
+            return results
+        
+        try:
+            # Assemble the encoded feature matrix for valid rows
+            features = np.empty((len(valid_rows), len(INPUT_COLUMNS)))
+            features[:, 0] = years[valid_rows]
+            features[:, 1] = prices[valid_rows]
+            if self.price_quantum:
+                features[:, 1] = np.round(features[:, 1] / self.price_quantum) * self.price_quantum
+            for column, feature in enumerate(CATEGORICAL_FEATURES, start=2):
+                features[:, column] = categorical_codes[feature][valid_rows]
+            
+            # Make predictions with a single forest call
+            model = snapshot.engine if snapshot.engine is not None else snapshot.model
+            proba = model.predict_proba(features)
+            if timing:
+                start = metrics.lap('predict_batch.forest', start)
+            indices, probabilities = top_k_classes(proba, top_k or self.top_k)
+        
+        except Exception as e:
+            if timing:
+                metrics.inc('prediction_errors_total', len(valid_rows), type=type(e).__name__)
+            for i in valid_rows:
+                results[i] = {
+                    'success': False,
+                    'errors': [str(e)]
+                }
+            return results
+        
+        for i, row_indices, row_probabilities in zip(valid_rows.tolist(), indices.tolist(),
+                                                     probabilities.tolist()):
+            results[i] = snapshot.format_result(row_indices, row_probabilities)
+        if timing:
+            metrics.lap('predict_batch.decode', start)
+        
+        return results
+    
+    def cache_stats(self):
+        """Return prediction cache counters (None when caching is disabled)"""
+        return self.cache.stats() if self.cache is not None else None
+    
     def get_available_options(self):
         """Get all available options for dropdowns"""
+        snapshot = self.snapshot
         return {
-            'fuel_types': list(self.label_encoders['Fuel type'].classes_),
-            'gear_types': list(self.label_encoders['Gear box type'].classes_),
-            'manufacturers': list(self.label_encoders['Manufacturer'].classes_),
-            'colors': list(self.label_encoders['Color'].classes_),
-            'accuracy': self.metadata['accuracy']
-        }
\ No newline at end of file
+            'fuel_types': list(snapshot.label_encoders['Fuel type'].classes_),
+            'gear_types': list(snapshot.label_encoders['Gear box type'].classes_),
+            'manufacturers': list(snapshot.label_encoders['Manufacturer'].classes_),
+            'colors': list(snapshot.label_encoders['Color'].classes_),
+            'accuracy': snapshot.metadata['accuracy']
+        }
@@ -0,0 +1,195 @@
+# prefork_benchmark.py
+"""
+Pre-fork Benchmark Module for Automobile Recommendation System
+Measures per-worker memory and request throughput of the pre-fork
+service from 1 to N workers, with the model loaded once by the parent
+(shared) or unpickled by every worker
+Author: Prathamesh Parab
+"""
+
+import argparse
+import gc
+import http.client
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from benchmark import quiet
+from service import PreforkServer, REQUEST_FIELDS
+from predictor import INPUT_COLUMNS
+
+# How the workers get their model
+MODES = {
+    # Parent loads the memory-mapped bundle once, workers inherit it
+    'shared': {'preload': True, 'predictor_options': {}},
+    # Every worker unpickles its own copy (the old behaviour)
+    'per-worker': {'preload': False, 'predictor_options': {'bundle': False}},
+}
+
+
+def memory_usage(pid):
+    """RSS, PSS and private (USS) bytes of a process, from /proc (Linux)
+
+    PSS splits shared pages between the processes mapping them, so the
+    PSS of all workers adds up to the memory they really use.
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            parts = rest.split()
+            if len(parts) == 2 and parts[1] == 'kB':
+                values[name] = int(parts[0]) * 1024
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def request_bodies(dataset_path, rows_per_request, n_bodies=64, seed=0):
+    """JSON /predict bodies, each a list of dataset rows"""
+    data = pd.read_csv(dataset_path, usecols=INPUT_COLUMNS)
+    rows = data.sample(rows_per_request * n_bodies, replace=True, random_state=seed)
+    cars = [dict(zip(REQUEST_FIELDS, values)) for values in rows[INPUT_COLUMNS].itertuples(index=False)]
+    return [json.dumps(cars[i:i + rows_per_request], default=lambda value: value.item()).encode('utf-8')
+            for i in range(0, len(cars), rows_per_request)]
+
+
+def client(host, port, bodies, duration, results):
+    """Send requests back to back over one keep-alive connection"""
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    requests = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        connection.request('POST', '/predict', body=bodies[requests % len(bodies)],
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"Request failed with status {response.status}")
+        requests += 1
+    connection.close()
+    results.put(requests)
+
+
+def run_load(host, port, connections, bodies, duration):
+    """Total requests completed by concurrent client processes in duration seconds"""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    clients = [context.Process(target=client, args=(host, port, bodies, duration, results))
+               for _ in range(connections)]
+    for process in clients:
+        process.start()
+    requests = [results.get() for _ in clients]
+    for process in clients:
+        process.join()
+    return sum(requests)
+
+
+def measure(models_dir, bodies, mode, workers, duration, connections_per_worker, max_wait_ms, max_batch_size):
+    """Throughput and mean per-worker memory for one mode and worker count"""
+    server = PreforkServer(models_dir, port=0, workers=workers, max_wait_ms=max_wait_ms,
+                           max_batch_size=max_batch_size, **MODES[mode])
+    start = time.perf_counter()
+    with quiet():
+        server.start()
+    startup_seconds = time.perf_counter() - start
+    try:
+        requests = run_load(server.host, server.port, workers * connections_per_worker, bodies, duration)
+        memory = [memory_usage(pid) for pid in server.pids]
+    finally:
+        server.stop()
+        server.predictor = None
+        gc.unfreeze()
+        gc.collect()
+
+    rows_per_request = len(json.loads(bodies[0]))
+    return {
+        'mode': mode,
+        'workers': workers,
+        'startup_seconds': startup_seconds,
+        'requests_per_second': requests / duration,
+        'rows_per_second': requests * rows_per_request / duration,
+        'worker_memory': {kind: float(np.mean([usage[kind] for usage in memory])) for kind in ('rss', 'pss', 'uss')},
+        'total_worker_pss': sum(usage['pss'] for usage in memory),
+    }
+
+
+def run(models_dir='models', dataset_path='cartest.csv', worker_counts=None, modes=None, duration=5,
+        connections_per_worker=2, rows_per_request=16, max_wait_ms=2, max_batch_size=256):
+    worker_counts = worker_counts or default_worker_counts()
+    modes = modes or list(MODES)
+    bodies = request_bodies(dataset_path, rows_per_request)
+
+    results = []
+    for mode in modes:
+        if mode == 'per-worker' and not os.path.exists(f'{models_dir}/car_model.pkl'):
+            print(f"⚠️ Skipping '{mode}': no pickle artifacts in {models_dir}")
+            continue
+        for workers in worker_counts:
+            print(f"⏱️ {mode}, {workers} worker(s)...")
+            results.append(measure(models_dir, bodies, mode, workers, duration, connections_per_worker,
+                                   max_wait_ms, max_batch_size))
+
+    # Speedup against the fewest workers measured in the same mode
+    for result in results:
+        base = min((other for other in results if other['mode'] == result['mode']), key=lambda r: r['workers'])
+        result['speedup'] = result['requests_per_second'] / base['requests_per_second']
+    return {'cpu_count': os.cpu_count(), 'rows_per_request': rows_per_request, 'results': results}
+
+
+def default_worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = {1, cpus}
+    count = 2
+    while count < cpus:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+
+def format_report(report):
+    lines = [f"📊 Pre-fork serving ({report['cpu_count']} CPUs, {report['rows_per_request']} cars per request)",
+             f"   {'mode':12}{'workers':>8}{'req/s':>10}{'cars/s':>10}{'speedup':>9}"
+             f"{'RSS/w':>10}{'PSS/w':>10}{'USS/w':>10}{'PSS all':>10}{'startup':>9}"]
+    for result in report['results']:
+        memory = result['worker_memory']
+        lines.append(
+            f"   {result['mode']:12}{result['workers']:>8}{result['requests_per_second']:>10.0f}"
+            f"{result['rows_per_second']:>10.0f}{result['speedup']:>8.2f}x"
+            f"{memory['rss'] / 1e6:>8.0f}MB{memory['pss'] / 1e6:>8.0f}MB{memory['uss'] / 1e6:>8.0f}MB"
+            f"{result['total_worker_pss'] / 1e6:>8.0f}MB{result['startup_seconds']:>8.2f}s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory and throughput of the pre-fork service")
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--dataset', default='cartest.csv', help="Rows sent as requests")
+    parser.add_argument('--workers', default=None,
+                        help="Comma-separated worker counts (default: 1, powers of two, CPU count)")
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated, from {', '.join(MODES)}")
+    parser.add_argument('--duration', type=float, default=5, help="Seconds of load per measurement")
+    parser.add_argument('--connections-per-worker', type=int, default=2)
+    parser.add_argument('--rows-per-request', type=int, default=16)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--output', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',')] if args.workers else None
+    modes = args.modes.split(',')
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown mode(s): {', '.join(unknown)}")
+
+    report = run(args.models_dir, args.dataset, worker_counts, modes, args.duration,
+                 args.connections_per_worker, args.rows_per_request, args.max_wait_ms, args.max_batch_size)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report written to {args.output}")
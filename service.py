@@ -0,0 +1,477 @@
+# service.py
+"""
+Prediction Service Module for Automobile Recommendation System
+Local asyncio HTTP/JSON service around CarPredictor with dynamic
+micro-batching: concurrent requests are held for a few milliseconds
+and scored together in one forest call. With several workers the
+parent loads the model once and forks workers that share it.
+SIGHUP, POST /reload or --watch hot-reload the models
+Author: Prathamesh Parab
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from collections import deque
+from http import HTTPStatus
+import numpy as np
+import pandas as pd
+from predictor import CarPredictor, INPUT_COLUMNS
+
+# JSON request fields, in INPUT_COLUMNS order
+REQUEST_FIELDS = ['year', 'price', 'fuel_type', 'gear_type', 'manufacturer', 'color']
+
+# Fields sent as numbers (numeric strings are accepted too); the rest are strings
+NUMERIC_FIELDS = {'year', 'price'}
+
+MAX_BODY_BYTES = 1 << 20
+
+# Larger JSON integers cannot be converted to a float exactly (or at all)
+MAX_EXACT_FLOAT = 2 ** 53
+
+
+def _to_builtin(value):
+    """JSON fallback for numpy scalars in prediction results"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class MicroBatcher:
+    def __init__(self, predictor, max_wait_ms=5, max_batch_size=256):
+        self.predictor = predictor
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.batch_sizes = deque(maxlen=10000)
+        self.batches = 0
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, car):
+        """Queue one car (dict of INPUT_COLUMNS) and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((car, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first request, then gather more until the deadline
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            cars = [car for car, _ in batch]
+            try:
+                # Score off the event loop so new requests keep queueing
+                frame = pd.DataFrame(cars, columns=INPUT_COLUMNS)
+                results = await loop.run_in_executor(None, self.predictor.predict_batch, frame)
+            except Exception:
+                # Keep one bad row from failing everyone batched with it
+                results = await loop.run_in_executor(None, self.score_rows, cars)
+
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def score_rows(self, cars):
+        """Score a batch (list of car dicts) one row at a time; a failing row only gets its own error"""
+        results = []
+        for car in cars:
+            try:
+                results.append(self.predictor.predict_batch(pd.DataFrame([car], columns=INPUT_COLUMNS))[0])
+            except Exception as e:
+                results.append({'success': False, 'errors': [str(e)]})
+        return results
+
+
+class CarPredictionService:
+    def __init__(self, predictor=None, host='127.0.0.1', port=8000, max_wait_ms=5, max_batch_size=256):
+        self.predictor = predictor or CarPredictor()
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(self.predictor, max_wait_ms, max_batch_size)
+        self.latencies = deque(maxlen=10000)
+        self.requests = 0
+        self.server = None
+
+    async def start(self, sock=None):
+        """Start listening; returns the asyncio server (port 0 picks a free port)
+
+        An already bound listening socket can be passed in (pre-fork workers
+        all accept on the parent's socket).
+        """
+        self.batcher.start()
+        if sock is not None:
+            self.server = await asyncio.start_server(self.handle_connection, sock=sock)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+    def stats(self):
+        """Latency percentiles (ms) and batch-size statistics"""
+        latencies = np.array(self.latencies) * 1000
+        batch_sizes = np.array(self.batcher.batch_sizes)
+        return {
+            'pid': os.getpid(),
+            'model': self.predictor.model_info(),
+            'requests': self.requests,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'p99': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            },
+            'batches': self.batcher.batches,
+            'batch_size': {
+                'mean': float(batch_sizes.mean()) if len(batch_sizes) else None,
+                'max': int(batch_sizes.max()) if len(batch_sizes) else None,
+            }
+        }
+
+    async def predict(self, payload):
+        """Score one car object or a list of them"""
+        cars = payload if isinstance(payload, list) else [payload]
+        results = []
+        pending = []
+        for car in cars:
+            missing = [field for field in REQUEST_FIELDS if not isinstance(car, dict) or field not in car]
+            if missing:
+                results.append({'success': False, 'errors': [f"Missing field: {field}" for field in missing]})
+                continue
+            errors = self.field_type_errors(car)
+            if errors:
+                results.append({'success': False, 'errors': errors})
+                continue
+            row = {column: car[field] for column, field in zip(INPUT_COLUMNS, REQUEST_FIELDS)}
+            results.append(None)
+            pending.append((len(results) - 1, self.batcher.submit(row)))
+
+        for index, result in zip([index for index, _ in pending],
+                                 await asyncio.gather(*[task for _, task in pending])):
+            results[index] = result
+        return results if isinstance(payload, list) else results[0]
+
+    @staticmethod
+    def field_type_errors(car):
+        """Reject fields of the wrong JSON type before they reach a shared batch"""
+        errors = []
+        for field in REQUEST_FIELDS:
+            value = car[field]
+            if field in NUMERIC_FIELDS:
+                if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                    errors.append(f"Field '{field}' must be a number")
+                elif isinstance(value, int) and not -MAX_EXACT_FLOAT <= value <= MAX_EXACT_FLOAT:
+                    errors.append(f"Field '{field}' is out of range")
+            elif not isinstance(value, str):
+                errors.append(f"Field '{field}' must be a string")
+        return errors
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/options':
+            return HTTPStatus.OK, self.predictor.get_available_options()
+        if method == 'GET' and path == '/stats':
+            return HTTPStatus.OK, self.stats()
+        if method == 'POST' and path == '/reload':
+            # Load off the event loop; requests keep using the current model meanwhile
+            reloaded = await asyncio.get_running_loop().run_in_executor(None, self.predictor.reload)
+            return HTTPStatus.OK, {'success': reloaded, 'model': self.predictor.model_info()}
+        if method == 'POST' and path == '/predict':
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {'success': False, 'errors': ["Invalid JSON body"]}
+            if not isinstance(payload, (dict, list)):
+                return HTTPStatus.BAD_REQUEST, {'success': False, 'errors': ["Expected a JSON object or list"]}
+            return HTTPStatus.OK, await self.predict(payload)
+        return HTTPStatus.NOT_FOUND, {'success': False, 'errors': [f"No route for {method} {path}"]}
+
+    async def handle_connection(self, reader, writer):
+        """Minimal HTTP/1.1 handling with keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get('content-length', '0') or '0'
+                length = int(length) if length.isascii() and length.isdigit() else -1
+                if length < 0:
+                    # The body cannot be framed, so the connection is closed after replying
+                    status, response = HTTPStatus.BAD_REQUEST, {'success': False,
+                                                                'errors': ["Invalid Content-Length"]}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, response = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'success': False,
+                                                                             'errors': ["Body too large"]}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, response = await self.route(method, path.split('?', 1)[0], body)
+                    keep_alive = (headers.get('connection', '').lower() != 'close'
+                                  and version == 'HTTP/1.1')
+
+                payload = json.dumps(response, default=_to_builtin).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class PreforkServer:
+    def __init__(self, models_dir='models', host='127.0.0.1', port=8000, workers=2, max_wait_ms=5,
+                 max_batch_size=256, preload=True, predictor_options=None, watch_interval=None):
+        """Pre-fork service: one listening socket, several worker processes
+
+        With preload the parent loads the predictor once and the workers
+        inherit it. A bundle is memory-mapped read-only, so every worker
+        reads the same page-cache copy of the forest; only the small
+        encoder tables are per process (copy-on-write). Without preload
+        each worker loads its own predictor after forking.
+
+        SIGHUP to the parent reloads the models in every worker (and in the
+        parent, for workers started later); with watch_interval each worker
+        also watches the models directory.
+        """
+        self.models_dir = models_dir
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self.preload = preload
+        self.predictor_options = predictor_options or {}
+        self.watch_interval = watch_interval
+        self.predictor = None
+        self.socket = None
+        self.pids = set()
+        self.stopping = False
+
+    def load(self):
+        """Load the shared predictor in the parent"""
+        self.predictor = CarPredictor(self.models_dir, **self.predictor_options)
+        if self.predictor.engine is None or self.predictor.model is not None:
+            print("⚠️ No model bundle found; workers share the unpickled forest only copy-on-write")
+
+    def start(self, timeout=120):
+        """Bind, load (with preload) and fork the workers; returns once all are serving"""
+        self.socket = socket.create_server((self.host, self.port), backlog=1024)
+        self.port = self.socket.getsockname()[1]
+        if self.preload:
+            self.load()
+
+        ready_read, ready_write = os.pipe()
+        for _ in range(self.workers):
+            self.spawn_worker(ready_write)
+        os.close(ready_write)
+
+        # Each worker writes one byte once it is accepting connections
+        ready = 0
+        deadline = time.monotonic() + timeout
+        with os.fdopen(ready_read, 'rb', buffering=0) as pipe:
+            while ready < self.workers and time.monotonic() < deadline:
+                data = pipe.read(self.workers - ready)
+                if not data:
+                    break
+                ready += len(data)
+        if ready < self.workers:
+            self.stop()
+            raise RuntimeError(f"Only {ready} of {self.workers} workers started")
+        return self.pids
+
+    def spawn_worker(self, ready_fd=None):
+        # Keep the loaded objects out of the collector, so collections in the
+        # worker do not write to (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self.pids.add(pid)
+            return pid
+
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            asyncio.run(self.run_worker(ready_fd))
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    async def run_worker(self, ready_fd=None):
+        """Serve on the shared socket until SIGTERM or SIGINT; SIGHUP reloads the models"""
+        predictor = self.predictor or CarPredictor(self.models_dir, **self.predictor_options)
+        service = CarPredictionService(predictor, self.host, self.port, self.max_wait_ms, self.max_batch_size)
+        await service.start(sock=self.socket)
+        if self.watch_interval:
+            predictor.watch(self.watch_interval)
+
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+        loop.add_signal_handler(signal.SIGHUP, predictor.reload_async)
+        if ready_fd is not None:
+            os.write(ready_fd, b'.')
+            os.close(ready_fd)
+        await stopping.wait()
+        await service.stop()
+
+    def serve_forever(self):
+        """Supervise the workers, restarting any that exit, until interrupted"""
+        def interrupt(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, interrupt)
+        signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
+        try:
+            while True:
+                pid, status = os.wait()
+                self.pids.discard(pid)
+                if not self.stopping:
+                    print(f"⚠️ Worker {pid} exited (status {status}), restarting")
+                    time.sleep(1)
+                    if self.predictor is not None and self.predictor.artifacts_changed():
+                        self.predictor.reload()
+                    self.spawn_worker()
+        finally:
+            self.stop()
+
+    def reload(self):
+        """Reload the models in every worker, and in the parent when it preloaded them"""
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+        if self.predictor is not None:
+            self.predictor.reload()
+
+    def stop(self, timeout=10):
+        """Stop the workers (SIGTERM, then SIGKILL after timeout) and close the socket"""
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.pids.discard(pid)
+        deadline = time.monotonic() + timeout
+        while self.pids:
+            for pid in list(self.pids):
+                try:
+                    finished, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    finished = pid
+                if finished:
+                    self.pids.discard(pid)
+            if time.monotonic() > deadline:
+                for pid in self.pids:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                self.pids.clear()
+            elif self.pids:
+                time.sleep(0.05)
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+async def serve(args):
+    predictor = CarPredictor(args.models_dir)
+    service = CarPredictionService(predictor, args.host, args.port, args.max_wait_ms, args.max_batch_size)
+    server = await service.start()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, predictor.reload_async)
+    if args.watch:
+        predictor.watch(args.watch)
+    print(f"🚗 Serving predictions on http://{service.host}:{service.port} "
+          f"(batch window {args.max_wait_ms}ms, max batch {args.max_batch_size})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Car recommendation HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes sharing the model loaded by the parent (pre-fork)")
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help="Poll the models directory and hot-reload new models (SIGHUP always reloads)")
+    args = parser.parse_args()
+    try:
+        if args.workers > 1:
+            server = PreforkServer(args.models_dir, args.host, args.port, args.workers,
+                                   args.max_wait_ms, args.max_batch_size, watch_interval=args.watch)
+            server.start()
+            print(f"🚗 Serving predictions on http://{server.host}:{server.port} with {args.workers} workers "
+                  f"(batch window {args.max_wait_ms}ms, max batch {args.max_batch_size})")
+            server.serve_forever()
+        else:
+            asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Service stopped")
@@ -0,0 +1,127 @@
+# similar_cars.py
+"""
+Similar Cars Module for Automobile Recommendation System
+Index over the training listings that returns the actual listings
+closest to a query (scaled year and log price, plus a fixed penalty per
+mismatched categorical), optionally within the predicted category
+Author: Prathamesh Parab
+"""
+
+import numpy as np
+
+SIMILAR_CARS_FILENAME = 'similar_cars.pkl'
+
+# Larger datasets are indexed from a seeded sample of this many listings
+DEFAULT_MAX_LISTINGS = 50000
+
+# Categorical features in model column order, with their result keys
+CATEGORICAL_FEATURES = {
+    'Fuel type': 'fuel_type',
+    'Gear box type': 'gear_type',
+    'Manufacturer': 'manufacturer',
+    'Color': 'color',
+}
+
+# Distance added by a mismatch on each categorical, in standard deviations
+# of year / log price (a different colour matters less than a different make)
+DEFAULT_WEIGHTS = {
+    'Fuel type': 1.0,
+    'Gear box type': 1.0,
+    'Manufacturer': 1.5,
+    'Color': 0.5,
+}
+
+
+class SimilarCarsIndex:
+    def __init__(self, years, prices, codes, car_names, targets, classes, weights=None):
+        """Index listings given as arrays
+
+        codes maps each categorical feature to its encoded values and
+        classes to its encoder classes; targets holds the encoded category
+        of each listing. Listings are stored sorted by category, so a
+        category-filtered query scans one contiguous slice.
+        """
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.penalties = np.array([weights[feature] ** 2 for feature in CATEGORICAL_FEATURES], dtype=np.float32)
+        self.classes = {feature: np.asarray(classes[feature], dtype=object) for feature in CATEGORICAL_FEATURES}
+
+        targets = np.asarray(targets)
+        order = np.argsort(targets, kind='stable')
+        self.years = np.asarray(years, dtype=np.int16)[order]
+        self.prices = np.asarray(prices, dtype=np.float64)[order]
+        self.codes = np.stack([np.asarray(codes[feature])[order] for feature in CATEGORICAL_FEATURES]).astype(np.int16)
+        self.car_names = np.asarray(car_names, dtype=object)[order]
+
+        log_prices = np.log(np.maximum(self.prices, 1.0))
+        self.year_mean, self.year_scale = float(self.years.mean()), float(self.years.std() or 1.0)
+        self.price_mean, self.price_scale = float(log_prices.mean()), float(log_prices.std() or 1.0)
+        self.year_z = ((self.years - self.year_mean) / self.year_scale).astype(np.float32)
+        self.price_z = ((log_prices - self.price_mean) / self.price_scale).astype(np.float32)
+
+        sorted_targets = targets[order]
+        categories, starts = np.unique(sorted_targets, return_index=True)
+        ends = np.append(starts[1:], len(sorted_targets))
+        self.category_slices = {category.item(): (int(start), int(end))
+                                for category, start, end in zip(categories, starts, ends)}
+
+    @classmethod
+    def from_training_data(cls, data, label_encoders, weights=None, max_listings=DEFAULT_MAX_LISTINGS, seed=42):
+        """Build from the trainer's prepared frame (encoded columns present)"""
+        if max_listings and len(data) > max_listings:
+            rows = np.sort(np.random.RandomState(seed).choice(len(data), max_listings, replace=False))
+            data = data.iloc[rows]
+        return cls(
+            years=data['Year'].to_numpy(),
+            prices=data['price'].to_numpy(),
+            codes={feature: data[feature + '_encoded'].to_numpy() for feature in CATEGORICAL_FEATURES},
+            car_names=data['CarName'].to_numpy(dtype=object),
+            targets=data['Target_encoded'].to_numpy(),
+            classes={feature: label_encoders[feature].classes_ for feature in CATEGORICAL_FEATURES},
+            weights=weights,
+        )
+
+    def distances(self, year, price, codes, start=0, end=None):
+        """Squared distances from one encoded query to listings[start:end]"""
+        year_z = np.float32((year - self.year_mean) / self.year_scale)
+        price_z = np.float32((np.log(max(price, 1.0)) - self.price_mean) / self.price_scale)
+        distances = self.year_z[start:end] - year_z
+        distances *= distances
+        price_delta = self.price_z[start:end] - price_z
+        distances += price_delta * price_delta
+        for row, feature in enumerate(CATEGORICAL_FEATURES):
+            distances += self.penalties[row] * (self.codes[row, start:end] != codes[feature])
+        return distances
+
+    def query(self, year, price, codes, k=5, category=None):
+        """The k listings closest to one encoded query, nearest first
+
+        codes maps each categorical feature to the query's encoded value.
+        With category set, only listings of that (encoded) category are
+        searched; an unknown category returns no listings.
+        """
+        if category is None:
+            start, end = 0, len(self.years)
+        elif category in self.category_slices:
+            start, end = self.category_slices[category]
+        else:
+            return []
+
+        distances = self.distances(year, price, codes, start, end)
+        k = min(k, len(distances))
+        if k < len(distances):
+            nearest = np.argpartition(distances, k - 1)[:k]
+        else:
+            nearest = np.arange(len(distances))
+        nearest = nearest[np.lexsort((nearest, distances[nearest]))]
+
+        listings = []
+        for i, distance in zip((nearest + start).tolist(), distances[nearest].tolist()):
+            listing = {'car': self.car_names[i], 'year': int(self.years[i]), 'price': float(self.prices[i])}
+            for row, (feature, key) in enumerate(CATEGORICAL_FEATURES.items()):
+                listing[key] = self.classes[feature][self.codes[row, i]]
+            listing['distance'] = float(np.sqrt(distance))
+            listings.append(listing)
+        return listings
+
+    def __len__(self):
+        return len(self.years)
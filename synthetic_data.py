@@ -0,0 +1,146 @@
+# synthetic_data.py
+"""
+Synthetic Data Module for Automobile Recommendation System
+Generates arbitrarily large car datasets that follow cartest.csv: a
+smoothed bootstrap keeps the joint distribution of Year, fuel, gearbox,
+manufacturer, color and CarName, and jitters prices around each record
+Author: Prathamesh Parab
+"""
+
+import argparse
+import operator
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Year', 'price', 'Fuel type', 'Gear box type', 'Manufacturer', 'Color', 'CarName']
+
+_worker_generator = None
+
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _render_chunk(chunk_index, n_rows):
+    # Encoded in the worker: bytes cross the process boundary far faster than str
+    return _worker_generator.render_chunk(chunk_index, n_rows).encode('utf-8')
+
+
+class SyntheticCarGenerator:
+    def __init__(self, source='cartest.csv', price_noise=0.05, seed=42):
+        """Learn the record distribution from the source CSV
+
+        price_noise is the standard deviation of the multiplicative
+        (log-normal) jitter applied to each sampled price.
+        """
+        self.source = source
+        self.price_noise = price_noise
+        self.seed = seed
+        self.data = pd.read_csv(source, usecols=COLUMNS)[COLUMNS]
+        self.prices = self.data['price'].to_numpy(dtype=np.float64)
+
+        # One CSV line per source record with a %d slot for the price, so
+        # rendering a sampled row is a single string format
+        templates = self.data.astype(str).apply(lambda column: column.str.replace('%', '%%'))
+        templates['price'] = '%d'
+        self.templates = templates.to_csv(header=False, index=False, lineterminator='\n').splitlines(True)
+        if len(self.templates) != len(self.data):
+            raise ValueError("Source records must not contain line breaks")
+
+    def _sample(self, chunk_index, n_rows):
+        """Source record indices and jittered prices for one chunk
+
+        Each chunk has its own random stream derived from (seed, chunk
+        index), so output is identical whatever the number of workers.
+        """
+        rng = np.random.default_rng([self.seed, chunk_index])
+        rows = rng.integers(0, len(self.data), n_rows)
+        prices = self.prices[rows] * np.exp(rng.normal(0.0, self.price_noise, n_rows))
+        return rows, np.maximum(np.rint(prices), 1).astype(np.int64)
+
+    def sample_chunk(self, chunk_index, n_rows):
+        """One chunk of synthetic records as a DataFrame"""
+        rows, prices = self._sample(chunk_index, n_rows)
+        chunk = self.data.iloc[rows].reset_index(drop=True)
+        chunk['price'] = prices
+        return chunk
+
+    def render_chunk(self, chunk_index, n_rows):
+        """One chunk of synthetic records as CSV text (no header)"""
+        rows, prices = self._sample(chunk_index, n_rows)
+        if n_rows < 2:
+            lines = [self.templates[row] for row in rows]
+        else:
+            lines = operator.itemgetter(*rows.tolist())(self.templates)
+        return ''.join(map(operator.mod, lines, prices.tolist()))
+
+    def sample(self, n_rows, chunksize=1000000):
+        """n_rows synthetic records as one DataFrame (same rows as generate)"""
+        chunks = [self.sample_chunk(index, min(chunksize, n_rows - start))
+                  for index, start in enumerate(range(0, n_rows, chunksize))]
+        return pd.concat(chunks, ignore_index=True) if chunks else self.data.iloc[:0].copy()
+
+    def generate(self, path, n_rows, chunksize=1000000, workers=None):
+        """Stream n_rows synthetic records to a CSV file
+
+        workers=0 renders chunks in this process; otherwise a process pool
+        renders them with at most two chunks per worker in flight. The
+        default uses one worker per CPU on multi-core machines.
+        """
+        if workers is None:
+            workers = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+        print(f"📂 Generating {n_rows:,} synthetic records from {self.source} -> {path}")
+        start = time.perf_counter()
+        sizes = [min(chunksize, n_rows - offset) for offset in range(0, n_rows, chunksize)]
+        written = 0
+
+        with open(path, 'wb') as f:
+            f.write((','.join(COLUMNS) + '\n').encode('utf-8'))
+
+            def write(chunk, n):
+                nonlocal written
+                f.write(chunk)
+                written += n
+                rate = written / (time.perf_counter() - start)
+                print(f"   {written:,} rows written ({rate:,.0f} rows/s)")
+
+            if not workers:
+                for index, size in enumerate(sizes):
+                    write(self.render_chunk(index, size).encode('utf-8'), size)
+            else:
+                with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                    in_flight = deque()
+                    for index, size in enumerate(sizes):
+                        in_flight.append((pool.submit(_render_chunk, index, size), size))
+                        if len(in_flight) >= 2 * workers:
+                            future, n = in_flight.popleft()
+                            write(future.result(), n)
+                    while in_flight:
+                        future, n = in_flight.popleft()
+                        write(future.result(), n)
+
+        elapsed = time.perf_counter() - start
+        print(f"✓ Generated {written:,} records in {elapsed:.1f}s "
+              f"({written / elapsed if elapsed else 0:,.0f} rows/s)")
+        return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic car dataset shaped like cartest.csv")
+    parser.add_argument('output', help="Output CSV path")
+    parser.add_argument('rows', type=int, help="Number of records to generate")
+    parser.add_argument('--source', default='cartest.csv', help="CSV whose distribution is reproduced")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--price-noise', type=float, default=0.05,
+                        help="Std. dev. of the log-normal price jitter (0 disables smoothing)")
+    parser.add_argument('--chunksize', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 0: generate in this process)")
+    args = parser.parse_args()
+    SyntheticCarGenerator(args.source, args.price_noise, args.seed).generate(
+        args.output, args.rows, args.chunksize, args.workers)
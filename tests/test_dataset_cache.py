@@ -0,0 +1,146 @@
+# test_dataset_cache.py
+"""
+Tests for the dataset column cache: invalidation, equality with
+read_csv and skipping the parse on a hit
+Author: Prathamesh Parab
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+import dataset_cache
+from dataset_cache import DatasetCache
+from model_trainer import CarModelTrainer
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cartest.csv')
+CATEGORICAL = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color', 'CarName']
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'cars.csv'
+    shutil.copy(DATASET, path)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DatasetCache(str(tmp_path / 'cache'))
+
+
+def bump_mtime(path):
+    """Move the mtime forward, whatever the filesystem's timestamp resolution"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+
+def test_first_load_builds_then_hits(cache, csv_path):
+    assert cache.load(csv_path).status == 'built'
+    assert cache.load(csv_path).status == 'hit'
+
+
+def test_touch_rehashes_without_rebuilding(cache, csv_path):
+    built = cache.load(csv_path)
+    bump_mtime(csv_path)
+    assert cache.load(csv_path).status == 'rehashed'
+    assert cache.load(csv_path).status == 'hit'
+    assert cache.load(csv_path).meta['created'] == built.meta['created']
+
+
+def test_same_size_edit_rebuilds(cache, csv_path):
+    cache.load(csv_path)
+    with open(csv_path) as f:
+        text = f.read()
+    with open(csv_path, 'w') as f:
+        f.write(text.replace('Red', 'Rex', 1))
+    bump_mtime(csv_path)
+
+    dataset = cache.load(csv_path)
+    assert dataset.status == 'built'
+    assert (dataset.to_frame()['Color'] == 'Rex').sum() == 1
+
+
+def test_append_rebuilds(cache, csv_path):
+    rows = len(cache.load(csv_path))
+    with open(csv_path, 'a') as f:
+        f.write('2015,20000,Petrol,Manual,TOYOTA,Blue,toyota corolla\n')
+
+    dataset = cache.load(csv_path)
+    assert dataset.status == 'built'
+    assert len(dataset) == rows + 1
+
+
+def test_frame_matches_read_csv(cache, csv_path):
+    expected = pd.read_csv(csv_path)
+    frame = cache.load(csv_path).to_frame()
+    assert list(frame.columns) == list(expected.columns)
+    assert frame.astype(expected.dtypes.to_dict()).equals(expected)
+    # Numbers are narrowed, never rounded
+    assert frame['Year'].dtype == np.int16
+    assert frame['price'].dtype == np.int32
+
+
+def test_codes_match_label_encoder(cache, csv_path):
+    expected = pd.read_csv(csv_path)
+    dataset = cache.load(csv_path)
+    for column in CATEGORICAL:
+        encoder = LabelEncoder().fit(expected[column])
+        assert np.array_equal(dataset.categories(column), encoder.classes_)
+        assert np.array_equal(dataset.codes(column), encoder.transform(expected[column]))
+
+
+def test_missing_values_round_trip(cache, tmp_path):
+    path = str(tmp_path / 'gaps.csv')
+    with open(path, 'w') as f:
+        f.write('Year,price,Color\n2010,15000.5,Red\n2011,,\n2012,18000,Blue\n')
+    expected = pd.read_csv(path)
+    dataset = cache.load(path)
+    assert dataset.has_missing('Color')
+    assert dataset.to_frame().astype(expected.dtypes.to_dict()).equals(expected)
+
+
+def test_trainer_encodings_match_parse_path(tmp_path, csv_path):
+    parsed = CarModelTrainer(csv_path, cache_dir=None)
+    parsed.prepare_data()
+    cached = CarModelTrainer(csv_path, cache_dir=str(tmp_path / 'cache'))
+    cached.prepare_data()
+
+    for feature, encoder in parsed.label_encoders.items():
+        assert np.array_equal(encoder.classes_, cached.label_encoders[feature].classes_)
+        assert np.array_equal(parsed.data[feature + '_encoded'], cached.data[feature + '_encoded'])
+    assert np.array_equal(parsed.target_encoder.classes_, cached.target_encoder.classes_)
+    assert parsed.category_cars == cached.category_cars
+
+
+@pytest.mark.parametrize('cache_dir', [None, 'cache'])
+def test_trainer_encodes_missing_categoricals_like_label_encoder(tmp_path, cache_dir):
+    path = str(tmp_path / 'gaps.csv')
+    data = pd.read_csv(DATASET).head(200)
+    data.loc[[3, 50, 120], 'Color'] = None
+    data.loc[[7], 'Fuel type'] = None
+    data.to_csv(path, index=False)
+    expected = pd.read_csv(path)
+
+    trainer = CarModelTrainer(path, cache_dir=cache_dir and str(tmp_path / cache_dir))
+    trainer.prepare_data()
+    for feature in ['Fuel type', 'Color']:
+        encoder = LabelEncoder().fit(expected[feature])
+        assert list(trainer.label_encoders[feature].classes_[:-1]) == list(encoder.classes_[:-1])
+        assert pd.isna(trainer.label_encoders[feature].classes_[-1]) and pd.isna(encoder.classes_[-1])
+        assert np.array_equal(trainer.data[feature + '_encoded'], encoder.transform(expected[feature]))
+
+
+def test_hit_skips_parsing(cache, csv_path, monkeypatch):
+    expected = cache.load(csv_path).to_frame()
+
+    def fail_read_csv(*args, **kwargs):
+        raise AssertionError("read_csv called on a cache hit")
+
+    monkeypatch.setattr(dataset_cache.pd, 'read_csv', fail_read_csv)
+    dataset = cache.load(csv_path)
+    assert dataset.status == 'hit'
+    assert dataset.to_frame().equals(expected)
+    assert dataset.meta['parse_seconds'] > 0
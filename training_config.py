@@ -0,0 +1,26 @@
+# training_config.py
+"""
+Training Configuration Module for Automobile Recommendation System
+Default training settings, kept free of heavy imports so the model
+registry can key builds without loading scikit-learn
+Author: Prathamesh Parab
+"""
+
+# Default training configuration; accuracy_mode is one of:
+#   'cv'          - serial k-fold cross-validation (extra refits, original behaviour)
+#   'cv_parallel' - k-fold cross-validation with folds run in a process pool
+#   'oob'         - out-of-bag score from the final fit (no extra refits)
+DEFAULT_TRAINING_CONFIG = {
+    'n_estimators': 100,
+    'max_depth': 20,
+    'random_state': 42,
+    'n_jobs': None,
+    'accuracy_mode': 'cv',
+    'cv_folds': 5,
+    'cv_jobs': None,
+}
+
+ACCURACY_MODES = ('cv', 'cv_parallel', 'oob')
+
+# Settings that only change how fast a model is built, never the model itself
+PARALLELISM_KEYS = ('n_jobs', 'cv_jobs')
@@ -0,0 +1,163 @@
+# tuning.py
+"""
+Hyperparameter Search Module for Automobile Recommendation System
+Incremental random forest tuning: configs that differ only in
+n_estimators share one warm-started forest, groups run in parallel,
+and fitted candidates are cached by config and data hash
+Author: Prathamesh Parab
+"""
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+
+
+def data_hash(*arrays):
+    """Stable content hash of the training arrays"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def config_key(config):
+    """Canonical string for a config dict"""
+    return json.dumps(config, sort_keys=True)
+
+
+def snapshot(model):
+    """Freeze a warm-started forest at its current size
+
+    Trees are shared with the growing model; only the estimator list is
+    copied, so later warm-start fits do not change the snapshot.
+    """
+    frozen = copy.copy(model)
+    frozen.estimators_ = list(model.estimators_)
+    frozen.warm_start = False
+    return frozen
+
+
+class HyperparameterSearch:
+    def __init__(self, X_train, y_train, X_test, y_test, random_state=42, n_jobs=-1, cache_dir=None):
+        self.X_train = X_train
+        self.y_train = y_train
+        self.X_test = X_test
+        self.y_test = y_test
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.data_hash = data_hash(X_train, y_train)
+        self.candidates = {}
+        self.results = None
+        self.best_config = None
+        self.best_model = None
+
+    def _cache_path(self, key):
+        name = hashlib.sha256(f'{self.data_hash}:{key}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{name}.pkl')
+
+    def get_cached(self, config):
+        """Return (model, fit_time) for a previously fitted config, or None"""
+        key = config_key(config)
+        if key in self.candidates:
+            return self.candidates[key]
+        if self.cache_dir and os.path.exists(self._cache_path(key)):
+            with open(self._cache_path(key), 'rb') as f:
+                self.candidates[key] = pickle.load(f)
+            return self.candidates[key]
+        return None
+
+    def put_cached(self, config, model, fit_time):
+        key = config_key(config)
+        self.candidates[key] = (model, fit_time)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_path(key), 'wb') as f:
+                pickle.dump((model, fit_time), f)
+
+    def _grow_group(self, base_params, sizes):
+        """Fit one forest per group, growing through the requested sizes"""
+        fitted = []
+        model = None
+        for n_estimators in sizes:
+            config = {**base_params, 'n_estimators': n_estimators}
+            cached = self.get_cached(config)
+            if cached is not None:
+                fitted.append((config, cached[0], cached[1], True))
+                model = None
+                continue
+
+            if model is None:
+                # Resume from the largest cached stage below this size, if any
+                previous = [entry for entry in fitted if entry[0]['n_estimators'] < n_estimators]
+                if previous:
+                    model = snapshot(previous[-1][1])
+                    model.warm_start = True
+                else:
+                    model = RandomForestClassifier(random_state=self.random_state, warm_start=True,
+                                                   **base_params)
+
+            start = time.perf_counter()
+            model.set_params(n_estimators=n_estimators)
+            model.fit(self.X_train, self.y_train)
+            fit_time = time.perf_counter() - start
+
+            frozen = snapshot(model)
+            self.put_cached(config, frozen, fit_time)
+            fitted.append((config, frozen, fit_time, False))
+        return fitted
+
+    def run(self, configs):
+        """Evaluate configs and return a table ranked by test accuracy
+
+        fit_time is the time spent growing that candidate from the previous
+        stage of its group; for cached candidates it is the original fit time.
+        """
+        groups = {}
+        for config in configs:
+            base_params = {name: value for name, value in config.items() if name != 'n_estimators'}
+            group = groups.setdefault(config_key(base_params), (base_params, set()))
+            group[1].add(config.get('n_estimators', 100))
+
+        fitted_groups = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(self._grow_group)(base_params, sorted(sizes))
+            for base_params, sizes in groups.values()
+        )
+
+        fitted = {}
+        for group in fitted_groups:
+            for config, model, fit_time, from_cache in group:
+                fitted[config_key(config)] = (model, fit_time, from_cache)
+
+        rows = []
+        for order, config in enumerate(configs):
+            config = {**config, 'n_estimators': config.get('n_estimators', 100)}
+            model, fit_time, from_cache = fitted[config_key(config)]
+            rows.append({
+                'config': config,
+                'accuracy': model.score(self.X_test, self.y_test),
+                'fit_time': fit_time,
+                'cached': from_cache,
+                'order': order
+            })
+
+        # Ties keep the original config order, like the serial search did
+        self.results = (pd.DataFrame(rows)
+                        .sort_values(['accuracy', 'order'], ascending=[False, True], kind='stable')
+                        .drop(columns='order')
+                        .reset_index(drop=True))
+        self.results.index += 1
+        self.results.index.name = 'rank'
+
+        self.best_config = self.results.iloc[0]['config']
+        self.best_model = fitted[config_key(self.best_config)][0]
+        return self.results
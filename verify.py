@@ -1,9 +1,11 @@
-import pandas as pd
+import os
 import numpy as np
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score
+from dataset_cache import DatasetCache
+from evaluation import evaluate, format_report
+from tuning import HyperparameterSearch
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -11,8 +13,9 @@ print("=" * 60)
 print("HIGH ACCURACY MODEL VERIFICATION")
 print("=" * 60)
 
-# Load dataset
-data = pd.read_csv('cartest.csv')
+# Load dataset (memory-mapped column cache, rebuilt when the CSV changes)
+dataset = DatasetCache().load('cartest.csv')
+data = dataset.to_frame()
 print(f"\n📊 Dataset: {len(data)} records")
 
 # Create simplified categories
@@ -38,8 +41,10 @@ label_encoders = {}
 categorical_features = ['Fuel type', 'Gear box type', 'Manufacturer', 'Color']
 
 for feature in categorical_features:
+    # The cache's dictionaries are sorted, so its codes are the label encoding
     label_encoders[feature] = LabelEncoder()
-    data[feature + '_encoded'] = label_encoders[feature].fit_transform(data[feature])
+    label_encoders[feature].classes_ = dataset.categories(feature)
+    data[feature + '_encoded'] = dataset.codes(feature).astype(np.int64)
 
 # Target encoding
 target_encoder = LabelEncoder()
@@ -64,54 +69,34 @@ configs = [
     {"n_estimators": 200, "max_depth": 20},
 ]
 
-best_accuracy = 0
-best_config = None
+# Warm-started, parallel search; set TUNING_CACHE_DIR to keep fitted candidates on disk
+search = HyperparameterSearch(X_train, y_train, X_test, y_test, random_state=42,
+                              cache_dir=os.environ.get('TUNING_CACHE_DIR'))
+results = search.run(configs)
+print(results.to_string(formatters={'accuracy': '{:.1%}'.format, 'fit_time': '{:.2f}s'.format}))
 
-for config in configs:
-    clf = RandomForestClassifier(random_state=42, **config)
-    clf.fit(X_train, y_train)
-    accuracy = clf.score(X_test, y_test)
-    print(f"\nConfig: {config}")
-    print(f"Accuracy: {accuracy:.1%}")
-    
-    if accuracy > best_accuracy:
-        best_accuracy = accuracy
-        best_config = config
+best_config = search.best_config
+best_clf = search.best_model
 
 print("\n" + "=" * 60)
 print("BEST CONFIGURATION DETAILED ANALYSIS")
 print("=" * 60)
 
-best_clf = RandomForestClassifier(random_state=42, **best_config)
-best_clf.fit(X_train, y_train)
-
-
 y_pred = best_clf.predict(X_test)
 
 accuracy = accuracy_score(y_test, y_pred)
 print(f"\n🏆 Best Configuration: {best_config}")
 print(f"✅ Test Accuracy: {accuracy:.1%}")
 
-cv_scores = cross_val_score(best_clf, X, y, cv=5)
+cv_scores = cross_val_score(best_clf, X, y, cv=5, n_jobs=-1)
 print(f"📊 Cross-Validation: {cv_scores.mean():.1%} (+/- {cv_scores.std() * 2:.1%})")
 
 print("\n" + "=" * 60)
 print("PREDICTION QUALITY CHECK")
 print("=" * 60)
 
-correct_manufacturer = 0
-for i in range(len(y_test)):
-    actual_category = target_encoder.inverse_transform([y_test[i]])[0]
-    predicted_category = target_encoder.inverse_transform([y_pred[i]])[0]
-    
-    actual_brand = actual_category.split()[0]
-    predicted_brand = predicted_category.split()[0]
-    
-    if actual_brand == predicted_brand:
-        correct_manufacturer += 1
-
-manufacturer_accuracy = correct_manufacturer / len(y_test)
-print(f"🏭 Manufacturer Match Rate: {manufacturer_accuracy:.1%}")
+report = evaluate(y_test, y_pred, target_encoder.classes_)
+print(format_report(report))
 
 # Sample predictions
 print("\n" + "=" * 60)
@@ -121,9 +106,11 @@ print("=" * 60)
 np.random.seed(42)
 sample_indices = np.random.choice(len(y_test), 10, replace=False)
 
-for idx in sample_indices:
-    actual = target_encoder.inverse_transform([y_test[idx]])[0]
-    predicted = target_encoder.inverse_transform([y_pred[idx]])[0]
+# Decode only the sampled rows, in one call each
+actual_categories = target_encoder.classes_.take(y_test[sample_indices])
+predicted_categories = target_encoder.classes_.take(y_pred[sample_indices])
+
+for actual, predicted in zip(actual_categories, predicted_categories):
     match = "✓" if actual == predicted else "✗"
     print(f"Actual: {actual:30} | Predicted: {predicted:30} {match}")
 